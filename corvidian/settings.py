@@ -56,6 +56,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.middleware.RequestTimingMiddleware",
+    "main.middleware.EdgeCacheMiddleware",
+    "main.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware", 
     "corsheaders.middleware.CorsMiddleware",
@@ -88,6 +91,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'corvidian.wsgi.application'
 
+SITE_URL = os.getenv("SITE_URL", "")
+FRONTEND_URL = os.getenv("FRONTEND_URL", "https://www.corvidian.io")
+
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "").split(",")
 
 # Database
@@ -97,6 +103,17 @@ DATABASES = {
     'default': dj_database_url.config(default=os.getenv("DATABASE_URL"))
 }
 
+# Optional read replica for the public article endpoints (main.routers). To
+# try it locally, point DATABASE_URL and DATABASE_REPLICA_URL at two SQLite
+# files and copy the first over the second after migrating; with
+# DATABASE_REPLICA_URL set, the test suite also runs ReplicaDatabaseTests.
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES['replica'] = dj_database_url.parse(os.getenv("DATABASE_REPLICA_URL"))
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['main.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 5))
+REPLICA_HEALTH_INTERVAL = int(os.getenv("REPLICA_HEALTH_INTERVAL", 10))
+
 
 CACHES = {
     'default': {
@@ -107,8 +124,28 @@ CACHES = {
 
 CACHE_TTL = int(os.getenv('CACHE_TTL', 300))
 
+# Edge caching of the article endpoints (main.cdn). Without a purge backend
+# the CDN keeps a response for up to CDN_S_MAXAGE after the article changes.
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL", "")
+CDN_PURGE_TOKEN = os.getenv("CDN_PURGE_TOKEN", "")
+CDN_PURGE_TIMEOUT = int(os.getenv("CDN_PURGE_TIMEOUT", 5))
+CDN_PURGE_BACKEND = os.getenv("CDN_PURGE_BACKEND", "main.cdn.HttpPurgeBackend" if CDN_PURGE_URL else "")
+CDN_MAX_AGE = int(os.getenv("CDN_MAX_AGE", 60))
+CDN_S_MAXAGE = int(os.getenv("CDN_S_MAXAGE", 86400 if CDN_PURGE_BACKEND else CACHE_TTL))
+CDN_STALE_WHILE_REVALIDATE = int(os.getenv("CDN_STALE_WHILE_REVALIDATE", 60))
+CDN_STALE_IF_ERROR = int(os.getenv("CDN_STALE_IF_ERROR", 86400))
+
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+# /api/metrics/ answers 404 until this is set; scrapers send it as a bearer token.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", 3600))
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd) hands the file
+# transfer to the front server instead of a gunicorn worker.
+MEDIA_OFFLOAD = os.getenv("MEDIA_OFFLOAD", "")
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -159,14 +196,35 @@ EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
+# Without a timeout a stalled SMTP server blocks the sending thread forever.
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 30))
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 CONSULTATION_RECEIVER_EMAIL = os.getenv("CONSULTATION_RECEIVER_EMAIL")
 CONSULTATION_WHATSAPP = os.getenv("CONSULTATION_WHATSAPP")
+CONSULTATION_NOTIFY_IMMEDIATE = os.getenv("CONSULTATION_NOTIFY_IMMEDIATE", "False") == "True"
+ADMIN_DIGEST_INTERVAL = int(os.getenv("ADMIN_DIGEST_INTERVAL", 300))
+ADMIN_DIGEST_BATCH_SIZE = int(os.getenv("ADMIN_DIGEST_BATCH_SIZE", 50))
+TRACKING_FLUSH_INTERVAL = int(os.getenv("TRACKING_FLUSH_INTERVAL", 10))
+TRACKING_FLUSH_BATCH = int(os.getenv("TRACKING_FLUSH_BATCH", 1000))
+NEWSLETTER_SEND_CHUNK_SIZE = int(os.getenv("NEWSLETTER_SEND_CHUNK_SIZE", 1000))
+# Transactional email is sent by a few threads per worker over kept-open SMTP
+# connections (main.mail); submitters wait MAIL_QUEUE_TIMEOUT when the queue is full.
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", 2))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 100))
+MAIL_QUEUE_TIMEOUT = float(os.getenv("MAIL_QUEUE_TIMEOUT", 2))
+MAIL_CONNECTION_IDLE = int(os.getenv("MAIL_CONNECTION_IDLE", 60))
+MAIL_SHUTDOWN_TIMEOUT = int(os.getenv("MAIL_SHUTDOWN_TIMEOUT", 10))
 
 CKEDITOR_UPLOAD_PATH = 'newsletter/uploads/'
-CKEDITOR_IMAGE_BACKEND = 'pillow'
+CKEDITOR_IMAGE_BACKEND = 'main.uploads.OptimizingImageBackend'
+CKEDITOR_IMAGE_MAX_DIMENSION = int(os.getenv("CKEDITOR_IMAGE_MAX_DIMENSION", 1600))
+CKEDITOR_IMAGE_QUALITY = int(os.getenv("CKEDITOR_IMAGE_QUALITY", 80))
+# Uploaded originals keep their EXIF data (GPS included): never under MEDIA_ROOT.
+CKEDITOR_ORIGINALS_ROOT = os.getenv("CKEDITOR_ORIGINALS_ROOT", str(BASE_DIR / 'private' / 'originals'))
+# Widths of the resized copies offered in the srcset of article images.
+ARTICLE_IMAGE_WIDTHS = [int(width) for width in os.getenv("ARTICLE_IMAGE_WIDTHS", "480,960,1440").split(",")]
 CKEDITOR_JQUERY_URL = 'https://ajax.googleapis.com/ajax/libs/jquery/3.6.0/jquery.min.js'
 CKEDITOR_ALLOW_NONIMAGE_FILES = False
 CKEDITOR_RESTRICT_BY_USER = False
@@ -16,15 +16,32 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.conf import settings
-from django.urls import path, include
-from django.conf.urls.static import static
-from ckeditor_uploader import views as ckeditor_views
+from django.urls import path, include, re_path
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils.module_loading import import_string
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
+from main.media import serve_media
+
+
+def lazy_view(dotted_path):
+    # ckeditor_uploader.views loads Pillow at import time; only editors
+    # need it, so import it on the first upload rather than in every worker.
+    def view(request, *args, **kwargs):
+        return import_string(dotted_path)(request, *args, **kwargs)
+    return view
+
+
+# Same routes and names as ckeditor_uploader.urls.
+ckeditor_urlpatterns = [
+    re_path(r'^upload/', csrf_exempt(staff_member_required(lazy_view('ckeditor_uploader.views.upload'))), name='ckeditor_upload'),
+    re_path(r'^browse/', never_cache(staff_member_required(lazy_view('ckeditor_uploader.views.browse'))), name='ckeditor_browse'),
+]
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('main.urls')),
-    path('ckeditor/', include('ckeditor_uploader.urls')),  
-
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('ckeditor/', include(ckeditor_urlpatterns)),
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+]
 
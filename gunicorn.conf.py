@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+
+
+def on_starting(server):
+    # Per-worker metric files from a previous master would otherwise be merged
+    # into the counters of this one.
+    metrics_dir = os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), "corvidian-metrics")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def post_worker_init(worker):
+    # LocMemCache is per process: warm each worker in the background so it
+    # starts accepting requests straight away, at a random point within the
+    # jitter so the workers spread their queries.
+    if os.getenv("WARM_CACHES_ON_BOOT", "True") != "True":
+        return
+    import threading
+    from main.warmup import warm_caches
+
+    budget = float(os.getenv("WARM_CACHES_BUDGET", 20))
+    jitter = float(os.getenv("WARM_CACHES_JITTER", 5))
+    threading.Thread(target=warm_caches, kwargs={"budget": budget, "jitter": jitter}, daemon=True).start()
+
+
+def worker_exit(server, worker):
+    # Send the pending admin digest and queued emails before the worker goes.
+    from main.mail import mail_executor
+    from main.notifications import admin_digest
+
+    admin_digest.flush()
+    mail_executor.shutdown()
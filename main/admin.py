@@ -1,13 +1,16 @@
 from django.contrib import admin, messages
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from django.db.models import Q, Sum
 from django.utils.html import strip_tags
+from .mail import mail_executor, send_timeout
 from .models import (
     Article,
     ConsultationLead,
     NewsletterSubscriber,
     NewsletterWelcomeMessage,
     NewsletterCampaign,
+    NewsletterCampaignStat,
 )
 
 
@@ -60,6 +63,7 @@ class NewsletterWelcomeMessageAdmin(admin.ModelAdmin):
             return
 
         sent_count = 0
+        pending = []
         for msg in queryset:
             try:
                 html_body = msg.build_html_body(request)
@@ -73,14 +77,29 @@ class NewsletterWelcomeMessageAdmin(admin.ModelAdmin):
                 )
                 if html_body:
                     email.attach_alternative(html_body, "text/html")
-                email.send()
-                sent_count += 1
+                pending.append((msg.subject, mail_executor.submit(email)))
             except Exception as e:
                 self.message_user(
                     request,
                     f"Failed to send '{msg.subject}': {str(e)}",
                     level=messages.ERROR,
                 )
+        for subject, future in pending:
+            try:
+                future.result(timeout=send_timeout())
+                sent_count += 1
+            except TimeoutError:
+                self.message_user(
+                    request,
+                    f"Still sending '{subject}'; it may arrive later.",
+                    level=messages.WARNING,
+                )
+            except Exception as e:
+                self.message_user(
+                    request,
+                    f"Failed to send '{subject}': {str(e)}",
+                    level=messages.ERROR,
+                )
 
         if sent_count > 0:
             self.message_user(
@@ -90,21 +109,51 @@ class NewsletterWelcomeMessageAdmin(admin.ModelAdmin):
             )
 
 
+class NewsletterCampaignStatInline(admin.TabularInline):
+    model = NewsletterCampaignStat
+    fields = ("event", "url", "count", "updated_at")
+    readonly_fields = fields
+    ordering = ("event", "-count")
+    extra = 0
+    can_delete = False
+    verbose_name = "Engagement"
+    verbose_name_plural = "Engagement"
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(NewsletterCampaign)
 class NewsletterCampaignAdmin(admin.ModelAdmin):
-    list_display = ("subject", "is_sent", "scheduled_for", "sent_at", "updated_at")
+    list_display = ("subject", "is_sent", "scheduled_for", "sent_at", "opens", "clicks", "updated_at")
     list_filter = ("is_sent", "created_at")
     search_fields = ("subject", "body")
     readonly_fields = ("sent_at", "created_at", "updated_at")
     actions = ["send_campaign", "send_test_email"]
+    inlines = [NewsletterCampaignStatInline]
     
     fieldsets = (
         (None, {"fields": ("subject", "is_sent", "scheduled_for")}),
         ("Content", {"fields": ("body",)}),
         ("Media", {"fields": ("hero_image",)}),
+        ("Audience", {"fields": ("segment_source", "segment_subscribed_after", "segment_subscribed_before")}),
         ("Delivery", {"fields": ("sent_at", "created_at", "updated_at")}),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            open_total=Sum("stats__count", filter=Q(stats__event=NewsletterCampaignStat.EVENT_OPEN)),
+            click_total=Sum("stats__count", filter=Q(stats__event=NewsletterCampaignStat.EVENT_CLICK)),
+        )
+
+    @admin.display(description="Opens", ordering="open_total")
+    def opens(self, obj):
+        return obj.open_total or 0
+
+    @admin.display(description="Clicks", ordering="click_total")
+    def clicks(self, obj):
+        return obj.click_total or 0
+
     @admin.action(description="Send test email to yourself")
     def send_test_email(self, request, queryset):
         admin_email = request.user.email
@@ -117,6 +166,7 @@ class NewsletterCampaignAdmin(admin.ModelAdmin):
             return
 
         sent_count = 0
+        pending = []
         for campaign in queryset:
             try:
                 html_body = campaign.build_html_body(request)
@@ -130,14 +180,29 @@ class NewsletterCampaignAdmin(admin.ModelAdmin):
                 )
                 if html_body:
                     email.attach_alternative(html_body, "text/html")
-                email.send()
-                sent_count += 1
+                pending.append((campaign.subject, mail_executor.submit(email)))
             except Exception as e:
                 self.message_user(
                     request,
                     f"Failed to send '{campaign.subject}': {str(e)}",
                     level=messages.ERROR,
                 )
+        for subject, future in pending:
+            try:
+                future.result(timeout=send_timeout())
+                sent_count += 1
+            except TimeoutError:
+                self.message_user(
+                    request,
+                    f"Still sending '{subject}'; it may arrive later.",
+                    level=messages.WARNING,
+                )
+            except Exception as e:
+                self.message_user(
+                    request,
+                    f"Failed to send '{subject}': {str(e)}",
+                    level=messages.ERROR,
+                )
 
         if sent_count > 0:
             self.message_user(
@@ -146,7 +211,7 @@ class NewsletterCampaignAdmin(admin.ModelAdmin):
                 level=messages.SUCCESS,
             )
 
-    @admin.action(description="Send selected campaigns to all subscribers")
+    @admin.action(description="Send selected campaigns to their audience")
     def send_campaign(self, request, queryset):
         total_emails = 0
         sent_campaigns = 0
@@ -0,0 +1,93 @@
+import atexit
+import os
+import threading
+
+
+class BufferedFlusher:
+    """Collects items in memory and hands them to ``flush_items`` in batches.
+
+    A daemon thread flushes every ``interval`` seconds, and reaching
+    ``batch_size`` buffered entries wakes it early. Whatever is still buffered
+    is flushed when the process exits. Buffers are per process, so every
+    gunicorn worker flushes its own batches.
+
+    When ``flush_items`` raises, the batch is put back in front of the items
+    buffered meanwhile and retried on the next interval. After
+    ``max_attempts`` failed flushes in a row the pending items are dropped.
+    """
+
+    def __init__(self, interval, batch_size, max_attempts=5):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._failed_attempts = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._buffer = self.new_buffer()
+        self._thread = None
+        self._pid = None
+
+    def new_buffer(self):
+        return []
+
+    def buffer_item(self, buffer, item):
+        buffer.append(item)
+
+    def requeue(self, buffer, failed):
+        """Merge the items of a failed flush back into ``buffer``."""
+        buffer[:0] = failed
+
+    def flush_items(self, buffer):
+        raise NotImplementedError
+
+    def add(self, item, flush_now=False):
+        with self._lock:
+            self.buffer_item(self._buffer, item)
+            # While flushes fail, a full buffer waits for the next interval.
+            full = len(self._buffer) >= self.batch_size and not self._failed_attempts
+        self._ensure_thread()
+        if full or flush_now:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            buffer, self._buffer = self._buffer, self.new_buffer()
+        if not buffer:
+            return
+        name = self.__class__.__name__
+        try:
+            self.flush_items(buffer)
+        except Exception as e:
+            with self._lock:
+                self._failed_attempts += 1
+                attempts = self._failed_attempts
+                retry = attempts < self.max_attempts
+                if retry:
+                    self.requeue(self._buffer, buffer)
+                else:
+                    self._failed_attempts = 0
+            if retry:
+                print(f"{name} flush failed (attempt {attempts} of {self.max_attempts}), retrying: {e}")
+            else:
+                print(f"{name} flush failed {attempts} times, dropping {len(buffer)} item(s): {e}")
+            return
+        self._failed_attempts = 0
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
@@ -0,0 +1,60 @@
+import time
+
+from django.core.cache import cache
+
+
+TAG_VERSION_KEY = "tags:{tag}:version"
+ARTICLE_LIST_TAG = "articles:list"
+
+
+def article_tag(slug):
+    return f"article:{slug}"
+
+
+def newsletter_tag(model, pk):
+    # Welcome messages and campaigns are separate tables with overlapping pks.
+    return f"newsletter:{model._meta.model_name}:{pk}"
+
+
+def _initial_version():
+    # Time based, so a version key that was evicted comes back larger than
+    # any number the old one reached and old entries stay unreachable.
+    return int(time.time() * 1000)
+
+
+def tag_versions(tags):
+    keys = {TAG_VERSION_KEY.format(tag=tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, tag in keys.items():
+        if key in found:
+            versions[tag] = found[key]
+        else:
+            versions[tag] = cache.get_or_set(key, _initial_version, None)
+    return versions
+
+
+def tagged_key(base, tags):
+    """Cache key for an entry that depends on ``tags``. Invalidating any of
+    the tags changes the key, so the entry is never read again."""
+    return tagged_keys({base: tags})[base]
+
+
+def tagged_keys(entries):
+    """``tagged_key`` for many ``{base: tags}`` entries in one cache read."""
+    versions = tag_versions({tag for tags in entries.values() for tag in tags})
+    return {
+        base: f"{base}:{':'.join(f'v{versions[tag]}' for tag in tags)}"
+        for base, tags in entries.items()
+    }
+
+
+def invalidate_tags(*tags):
+    """Drop every cached entry that depends on any of ``tags``: one cache
+    write per tag, however many entries carry it."""
+    for tag in set(tags):
+        key = TAG_VERSION_KEY.format(tag=tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
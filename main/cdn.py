@@ -0,0 +1,133 @@
+"""Edge caching of the public article endpoints.
+
+Article responses carry a shared-cache ``Cache-Control`` and their cache tags
+(``main.cache_tags``) as ``Surrogate-Key`` (Fastly, Varnish) and
+``Cache-Tag`` (Cloudflare, Akamai) headers. When articles are written the
+same tags are handed to the purge backend named by CDN_PURGE_BACKEND, so
+the edge can keep responses for CDN_S_MAXAGE and still drop them at once.
+"""
+import json
+import threading
+import urllib.request
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .routers import replica_configured
+
+
+# Like django.core.mail.outbox: every purge made by LocMemPurgeBackend.
+purged = []
+
+
+class BasePurgeBackend:
+    def purge(self, tags):
+        raise NotImplementedError
+
+
+class HttpPurgeBackend(BasePurgeBackend):
+    """POSTs ``{"tags": [...]}`` to CDN_PURGE_URL, with the tags also in a
+    ``Surrogate-Key`` header, e.g. for a purge worker in front of the CDN
+    API."""
+
+    def purge(self, tags):
+        headers = {"Content-Type": "application/json", "Surrogate-Key": " ".join(tags)}
+        token = getattr(settings, "CDN_PURGE_TOKEN", "")
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(
+            settings.CDN_PURGE_URL,
+            data=json.dumps({"tags": tags}).encode(),
+            headers=headers,
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=getattr(settings, "CDN_PURGE_TIMEOUT", 5)) as response:
+            response.read()
+
+
+class LocMemPurgeBackend(BasePurgeBackend):
+    """Records purges in ``main.cdn.purged`` instead of sending them."""
+
+    def purge(self, tags):
+        purged.append(tags)
+
+
+def get_purge_backend():
+    path = getattr(settings, "CDN_PURGE_BACKEND", "")
+    return import_string(path)() if path else None
+
+
+def purge_tags(*tags):
+    """Purge ``tags`` from the edge once the current transaction commits, so
+    the refetch cannot read the rows from before the write.
+
+    The refetch is an anonymous read and may be served by the replica; with
+    one configured the tags are purged again after REPLICA_PIN_SECONDS, so a
+    copy taken from a lagging replica is not kept for CDN_S_MAXAGE.
+    """
+    backend = get_purge_backend()
+    if backend is None or not tags:
+        return
+    tags = sorted(set(tags))
+
+    def purge():
+        try:
+            backend.purge(tags)
+        except Exception as e:
+            # The cached copies expire after CDN_S_MAXAGE anyway.
+            print(f"CDN purge of {len(tags)} tag(s) failed: {e}")
+
+    def purge_now_and_after_lag():
+        purge()
+        if replica_configured():
+            timer = threading.Timer(getattr(settings, "REPLICA_PIN_SECONDS", 5), purge)
+            timer.daemon = True
+            timer.start()
+
+    transaction.on_commit(purge_now_and_after_lag)
+
+
+def cache_control():
+    return (
+        f"public, max-age={getattr(settings, 'CDN_MAX_AGE', 60)}, "
+        f"s-maxage={getattr(settings, 'CDN_S_MAXAGE', 300)}, "
+        f"stale-while-revalidate={getattr(settings, 'CDN_STALE_WHILE_REVALIDATE', 60)}, "
+        f"stale-if-error={getattr(settings, 'CDN_STALE_IF_ERROR', 86400)}"
+    )
+
+
+EDGE_HEADERS = ("Surrogate-Key", "Cache-Tag")
+
+
+class EdgeCacheMixin:
+    """Marks successful reads of the view as cacheable at the edge, tagged
+    with ``get_surrogate_keys(request)``. EdgeCacheMiddleware takes the
+    marking back if a cookie is set on the way out."""
+
+    def get_surrogate_keys(self, request):
+        raise NotImplementedError
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            request.method in ("GET", "HEAD")
+            and response.status_code == 200
+            and not response.cookies
+            and not response.has_header("Cache-Control")
+        ):
+            tags = self.get_surrogate_keys(request)
+            response["Cache-Control"] = cache_control()
+            response["Surrogate-Key"] = " ".join(tags)
+            response["Cache-Tag"] = ",".join(tags)
+        return response
+
+
+def make_private(response):
+    """Undo EdgeCacheMixin for a response that sets a cookie, which an edge
+    would either refuse to cache or replay to every client."""
+    if response.cookies and response.has_header(EDGE_HEADERS[0]):
+        for header in EDGE_HEADERS:
+            del response[header]
+        response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register("media", deploy=True)
+def check_media_offload(app_configs, **kwargs):
+    if getattr(settings, "MEDIA_OFFLOAD", ""):
+        return []
+    return [
+        Warning(
+            "MEDIA_OFFLOAD is not set, so media files are sent by the gunicorn workers.",
+            hint="Set MEDIA_OFFLOAD to 'x-accel-redirect' or 'x-sendfile' behind nginx/Apache.",
+            id="main.W001",
+        )
+    ]
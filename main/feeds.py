@@ -0,0 +1,137 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.html import escape
+
+from .models import ArticleSnapshot, FeedDocument
+from .routers import unpinned_writes
+
+
+FEED_LIMIT = 20
+FEED_CACHE_KEY = "feeds:{name}"
+FEED_TITLE = "Corvidian Wawasan"
+FEED_DESCRIPTION = "Insight seputar teknologi, automasi, dan transformasi digital dari Corvidian."
+EMPTY_FEED_UPDATED = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+SITEMAP = "sitemap"
+RSS = "rss"
+ATOM = "atom"
+FEED_CONTENT_TYPES = {
+    SITEMAP: "application/xml; charset=utf-8",
+    RSS: "application/rss+xml; charset=utf-8",
+    ATOM: "application/atom+xml; charset=utf-8",
+}
+
+
+def frontend_url(path=""):
+    return f"{getattr(settings, 'FRONTEND_URL', '').rstrip('/')}{path}"
+
+
+def article_url(slug):
+    return frontend_url(f"/wawasan/{slug}")
+
+
+def build_feed_fragments(article):
+    """The sitemap and feed entries of one article, stored on its snapshot so
+    regenerating a document is a concatenation rather than a re-render."""
+    url = escape(article_url(article.slug))
+    title = escape(article.title)
+    summary = escape(article.excerpt)
+    published = datetime.datetime.combine(article.published_at, datetime.time(), tzinfo=datetime.timezone.utc)
+    updated = article.updated_at or timezone.now()
+    return {
+        "sitemap_entry": f"<url><loc>{url}</loc><lastmod>{updated.date().isoformat()}</lastmod></url>",
+        "rss_item": (
+            f"<item><title>{title}</title><link>{url}</link><guid>{url}</guid>"
+            f"<dc:creator>{escape(article.author)}</dc:creator><pubDate>{rfc2822_date(published)}</pubDate>"
+            f"<description>{summary}</description></item>"
+        ),
+        "atom_entry": (
+            f'<entry><title>{title}</title><link href="{url}" rel="alternate"/><id>{url}</id>'
+            f"<author><name>{escape(article.author)}</name></author>"
+            f"<published>{rfc3339_date(published)}</published><updated>{rfc3339_date(updated)}</updated>"
+            f"<summary>{summary}</summary></entry>"
+        ),
+    }
+
+
+def _documents():
+    """Return ``{name: (render, updated)}``: ``render(last_modified)`` builds
+    the document and ``updated`` is when its newest article last changed."""
+    entries = ArticleSnapshot.objects.order_by("-published_at", "-article")
+    sitemap = list(entries.values_list("sitemap_entry", "article__updated_at"))
+    items = list(entries.values_list("rss_item", "atom_entry", "article__updated_at")[:FEED_LIMIT])
+    # Without articles the documents never change.
+    sitemap_updated = max((updated for _, updated in sitemap), default=EMPTY_FEED_UPDATED)
+    feed_updated = max((updated for _, _, updated in items), default=EMPTY_FEED_UPDATED)
+    sitemap_entries = "".join(entry for entry, _ in sitemap)
+    rss_items = "".join(item for item, _, _ in items)
+    atom_entries = "".join(entry for _, entry, _ in items)
+    home = escape(frontend_url("/wawasan"))
+    return {
+        SITEMAP: (
+            lambda last_modified: (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{sitemap_entries}</urlset>'
+            ),
+            sitemap_updated,
+        ),
+        RSS: (
+            lambda last_modified: (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+                f"<title>{FEED_TITLE}</title><link>{home}</link><description>{FEED_DESCRIPTION}</description>"
+                f"<language>id</language><lastBuildDate>{rfc2822_date(last_modified)}</lastBuildDate>{rss_items}</channel></rss>"
+            ),
+            feed_updated,
+        ),
+        ATOM: (
+            lambda last_modified: (
+                '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+                f'<title>{FEED_TITLE}</title><subtitle>{FEED_DESCRIPTION}</subtitle><link href="{home}" rel="alternate"/>'
+                f"<id>{home}</id><updated>{rfc3339_date(last_modified)}</updated>{atom_entries}</feed>"
+            ),
+            feed_updated,
+        ),
+    }
+
+
+def regenerate_feed_documents():
+    """Store the documents that changed. The ETag is taken from the document
+    as the articles alone date it, so regenerating unchanged documents keeps
+    their validators. Last-Modified never moves backwards: when the newest
+    article is deleted it becomes now instead."""
+    previous = {name: (etag, modified) for name, etag, modified in FeedDocument.objects.values_list("name", "etag", "last_modified")}
+    for name, (render, updated) in _documents().items():
+        etag = hashlib.sha1(render(updated).encode()).hexdigest()
+        last_modified = updated
+        if name in previous:
+            previous_etag, previous_modified = previous[name]
+            if previous_etag == etag:
+                continue
+            if updated <= previous_modified:
+                last_modified = max(timezone.now(), previous_modified + datetime.timedelta(seconds=1))
+        FeedDocument.objects.update_or_create(
+            name=name,
+            defaults={"content": render(last_modified), "etag": etag, "last_modified": last_modified},
+        )
+        cache.delete(FEED_CACHE_KEY.format(name=name))
+
+
+def get_feed_document(name):
+    """Return ``(content, etag, last_modified)``, generating the stored
+    documents on first use."""
+    cache_key = FEED_CACHE_KEY.format(name=name)
+    document = cache.get(cache_key)
+    if document is None:
+        document = FeedDocument.objects.filter(name=name).values_list("content", "etag", "last_modified").first()
+        if document is None:
+            with unpinned_writes():
+                regenerate_feed_documents()
+            document = FeedDocument.objects.values_list("content", "etag", "last_modified").get(name=name)
+        cache.set(cache_key, document, getattr(settings, "CACHE_TTL", 300))
+    return document
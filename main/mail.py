@@ -0,0 +1,161 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+
+# Errors of a connection that went stale while idle; the message is sent
+# again on a fresh one.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+_STOP = object()
+
+
+class MailQueueFull(Exception):
+    pass
+
+
+class MailExecutor:
+    """Sends email from a few per-process threads, each keeping its SMTP
+    connection open between messages.
+
+    ``submit`` queues a message and returns a ``Future`` of its sent count.
+    At most ``queue_size`` messages wait; when the queue is full ``submit``
+    blocks for up to ``queue_timeout`` seconds and then raises
+    ``MailQueueFull``. Connections idle for ``idle_timeout`` seconds are
+    closed. ``shutdown`` sends what is queued before the threads stop; it runs
+    at exit and from the gunicorn ``worker_exit`` hook.
+    """
+
+    def __init__(self, workers, queue_size, queue_timeout, idle_timeout, shutdown_timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.idle_timeout = idle_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self._lock = threading.Lock()
+        self._queue = None
+        self._threads = []
+        self._pid = None
+        self._closed = False
+
+    def submit(self, message):
+        future = Future()
+        if self._closed:
+            # Shutting down, e.g. the admin digest flushing at exit.
+            future.set_running_or_notify_cancel()
+            connection = self._deliver(None, message, future)
+            if connection is not None:
+                connection.close()
+            return future
+        self._ensure_threads()
+        try:
+            self._queue.put((message, future), timeout=self.queue_timeout)
+        except queue.Full:
+            raise MailQueueFull(f"{self.queue_size} emails already waiting to be sent") from None
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._closed or self._pid != os.getpid():
+                self._closed = True
+                return
+            self._closed = True
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=self.shutdown_timeout)
+            except queue.Full:
+                # The threads are daemons; what is still queued is lost.
+                break
+        for thread in self._threads:
+            thread.join(self.shutdown_timeout)
+
+    def _ensure_threads(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is None:
+                atexit.register(self.shutdown)
+            # Threads and queued messages do not survive a fork.
+            self._queue = queue.Queue(self.queue_size)
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self.__class__.__name__}-{number}", daemon=True)
+                for number in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = pid
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                continue
+            if item is _STOP:
+                break
+            message, future = item
+            if future.set_running_or_notify_cancel():
+                connection = self._deliver(connection, message, future)
+        if connection is not None:
+            connection.close()
+
+    def _deliver(self, connection, message, future):
+        """Send ``message`` and settle ``future``; returns the connection to
+        reuse, or ``None`` when it should not be."""
+        try:
+            if connection is None:
+                # Opened here, send_messages leaves the connection open for
+                # the next message instead of closing it after this one.
+                connection = get_connection()
+                connection.open()
+            try:
+                sent = connection.send_messages([message])
+            except RECONNECT_ERRORS:
+                connection.close()
+                connection.open()
+                sent = connection.send_messages([message])
+        except Exception as e:
+            print(f"Failed to send email to {', '.join(message.to)}: {e}")
+            future.set_exception(e)
+            if connection is not None:
+                connection.close()
+            return None
+        future.set_result(sent)
+        return connection
+
+
+mail_executor = MailExecutor(
+    workers=getattr(settings, "MAIL_WORKERS", 2),
+    queue_size=getattr(settings, "MAIL_QUEUE_SIZE", 100),
+    queue_timeout=getattr(settings, "MAIL_QUEUE_TIMEOUT", 2),
+    idle_timeout=getattr(settings, "MAIL_CONNECTION_IDLE", 60),
+    shutdown_timeout=getattr(settings, "MAIL_SHUTDOWN_TIMEOUT", 10),
+)
+
+
+def send_timeout():
+    """How long a caller waits on a submitted message: the queue wait plus
+    one SMTP exchange."""
+    return getattr(settings, "MAIL_QUEUE_TIMEOUT", 2) + (getattr(settings, "EMAIL_TIMEOUT", None) or 30)
+
+
+def send_in_background(message):
+    """Queue ``message`` on ``mail_executor``, dropping it with a log line
+    when the queue stays full."""
+    try:
+        return mail_executor.submit(message)
+    except MailQueueFull as e:
+        print(f"Dropped email to {', '.join(message.to)}: {e}")
+        return None
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.markup import rewrite_images
+
+
+IMAGE_STYLE = "display:block;max-width:100%;width:auto;height:auto;border:0;outline:none;text-decoration:none;margin:10px 0;"
+
+
+def rewrite_image(img):
+    # The remote-site branch of NewsletterContent._render_html_body.
+    src = img.get("src", "")
+    if not src or src.startswith("data:"):
+        return
+    if not src.startswith("http"):
+        img["src"] = f"https://api.corvidian.io/{src.lstrip('/')}"
+    img["style"] = IMAGE_STYLE
+    if img.get("width"):
+        del img["width"]
+    if img.get("height"):
+        del img["height"]
+
+
+def editor_body(sections):
+    return "".join(
+        f'<h2>Bagian {i}</h2><p class="lead">Paragraf &amp; teks {i} dengan <strong>penekanan</strong> '
+        f'dan <a href="https://www.corvidian.io/{i}">tautan</a>.</p>'
+        f'<p><img src="/media/newsletter/uploads/{i}.jpg" width="800" height="600" alt="gambar {i}"></p>\n'
+        for i in range(sections)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Time main.markup.rewrite_images against a BeautifulSoup rewrite of "
+        "the same newsletter body, best of several runs, and fail when the "
+        "streaming rewrite is not faster by --min-speedup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sections", type=int, default=300, help="Heading, paragraph and image groups in the body.")
+        parser.add_argument("--runs", type=int, default=5, help="Runs per implementation; the fastest counts.")
+        parser.add_argument("--min-speedup", type=float, default=0, help="Fail below this speedup over BeautifulSoup.")
+
+    def handle(self, *args, **options):
+        try:
+            from bs4 import BeautifulSoup
+        except ImportError:
+            raise CommandError("beautifulsoup4 is not installed") from None
+
+        def with_tree(html):
+            soup = BeautifulSoup(html, "html.parser")
+            for img in soup.find_all("img"):
+                rewrite_image(img)
+            return str(soup)
+
+        def best_of(func, html):
+            timings = []
+            for _ in range(options["runs"]):
+                start = time.perf_counter()
+                func(html)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        body = editor_body(options["sections"])
+        streaming = best_of(lambda html: rewrite_images(html, rewrite_image), body)
+        tree = best_of(with_tree, body)
+        speedup = tree / streaming
+        self.stdout.write(
+            f"{len(body) / 1024:.0f} KiB body: rewrite_images {streaming * 1000:.2f}ms, "
+            f"BeautifulSoup {tree * 1000:.2f}ms, {speedup:.1f}x faster."
+        )
+        if speedup < options["min_speedup"]:
+            raise CommandError(f"rewrite_images is only {speedup:.1f}x faster, expected {options['min_speedup']}x")
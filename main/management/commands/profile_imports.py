@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so nothing this process already imported hides
+# the cost. Loading the WSGI application and resolving the URLconf is what a
+# gunicorn worker does before it serves its first request.
+BOOT_SCRIPT = """
+import json, resource, time
+started = time.perf_counter()
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+for module in {modules!r}:
+    __import__(module)
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+
+def parse_importtime(output):
+    """Return ``[(module, self_us, cumulative_us, depth)]`` from the stderr
+    of ``python -X importtime``."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the application the way a gunicorn worker does, in a fresh "
+        "interpreter, and report import time, the slowest imports and peak "
+        "memory, so regressions in worker start-up can be tracked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to list.")
+        parser.add_argument(
+            "--module", action="append", default=[], dest="modules",
+            help="Also import this module after boot. May be given more than once.",
+        )
+        parser.add_argument(
+            "--check", action="append", default=[], dest="absent",
+            help="Fail if this module is imported during boot. May be given more than once.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT.format(modules=options["modules"])],
+            capture_output=True, text=True, env=env,
+        )
+        if process.returncode:
+            raise CommandError(f"Boot failed:\n{process.stderr[-2000:]}")
+
+        boot = json.loads(process.stdout.strip().splitlines()[-1])
+        imports = parse_importtime(process.stderr)
+        imported = {name for name, _, _, _ in imports}
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        max_rss_kb = boot["max_rss"] // 1024 if sys.platform == "darwin" else boot["max_rss"]
+        report = {
+            "boot_seconds": round(boot["seconds"], 4),
+            "import_seconds": round(sum(self_us for _, self_us, _, _ in imports) / 1e6, 4),
+            "modules": len(imports),
+            "max_rss_kb": max_rss_kb,
+            "slowest": [
+                {"module": name, "cumulative_ms": round(cumulative / 1000, 2), "self_ms": round(self_us / 1000, 2)}
+                for name, self_us, cumulative, depth in sorted(imports, key=lambda item: -item[2])
+                if depth == 0
+            ][:options["top"]],
+            "unexpected": sorted(name for name in options["absent"] if name in imported),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(
+                f"Booted in {report['boot_seconds'] * 1000:.0f}ms, {report['modules']} modules imported "
+                f"in {report['import_seconds'] * 1000:.0f}ms, peak RSS {report['max_rss_kb'] / 1024:.1f} MiB."
+            )
+            self.stdout.write("Slowest top-level imports (cumulative / self, ms):")
+            for entry in report["slowest"]:
+                self.stdout.write(f"  {entry['cumulative_ms']:>9.2f} {entry['self_ms']:>9.2f}  {entry['module']}")
+
+        if report["unexpected"]:
+            raise CommandError(f"Imported during boot: {', '.join(report['unexpected'])}")
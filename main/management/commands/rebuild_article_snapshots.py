@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from main.cache_tags import ARTICLE_LIST_TAG, article_tag
+from main.feeds import regenerate_feed_documents
+from main.models import Article
+from main.related import rebuild_article_index
+from main.signals import invalidate_article_tags
+from main.snapshots import rebuild_article_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the optimized content of every article, then rebuild the related-article index, "
+        "the stored API snapshots and the feeds. "
+        "Run after data migrations or loaddata, which bypass the model signals."
+    )
+
+    def handle(self, *args, **options):
+        refreshed = sum(article.refresh_derived_fields() for article in Article.objects.iterator())
+        rebuild_article_index()
+        count = rebuild_article_snapshots()
+        regenerate_feed_documents()
+        invalidate_article_tags(ARTICLE_LIST_TAG, *(article_tag(slug) for slug in Article.objects.values_list("slug", flat=True)))
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} article(s); rebuilt {count} article snapshot(s)."))
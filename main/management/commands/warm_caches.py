@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from main.warmup import warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        "Prebuild cached article list pages, recent article details and rendered "
+        "newsletter bodies. Caches are per process with LocMemCache, so gunicorn "
+        "also runs this in every worker (see gunicorn.conf.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=3, help="Number of list pages to warm.")
+        parser.add_argument("--details", type=int, default=20, help="Number of most recent articles to warm.")
+        parser.add_argument("--budget", type=float, default=30.0, help="Time budget in seconds.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Number of concurrent warm-up tasks.")
+        parser.add_argument("--skip-newsletters", action="store_true", help="Do not render newsletter bodies.")
+
+    def handle(self, *args, **options):
+        results = warm_caches(
+            pages=options["pages"],
+            details=options["details"],
+            newsletters=not options["skip_newsletters"],
+            budget=options["budget"],
+            concurrency=options["concurrency"],
+            log=lambda message: self.stderr.write(message),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {results['warmed']} entries in {results['elapsed']:.2f}s "
+            f"({results['failed']} failed, {results['skipped']} skipped over budget)."
+        ))
@@ -0,0 +1,249 @@
+"""Single-pass rewriting of editor HTML.
+
+``rewrite_images`` produces exactly what ``str(BeautifulSoup(html,
+"html.parser"))`` would after editing the ``<img>`` attributes, without
+building a tree. It runs the same tokenizer BeautifulSoup uses, keeps only
+the stack of open tag names, and mirrors how BeautifulSoup builds and
+serializes a document: character references decoded and ``&<>`` re-escaped,
+whitespace-only strings collapsed, attributes sorted, list-valued attributes
+such as ``class`` normalized, void elements written as ``<br/>``, stray end
+tags dropped and open tags closed at the end. ``main.tests`` checks the
+output against BeautifulSoup.
+
+With ``minify=True`` the output is no longer BeautifulSoup's: runs of
+whitespace outside ``<pre>``, ``<textarea>`` and raw text collapse to one
+space, comments are dropped and ``style`` attributes are compacted.
+"""
+import re
+from collections import Counter
+from html.entities import html5
+from html.parser import HTMLParser
+
+
+VOID_ELEMENTS = frozenset("""
+    area base br col embed hr img input keygen link menuitem meta param source
+    track wbr basefont bgsound command frame image isindex nextid spacer
+""".split())
+PRESERVE_WHITESPACE_ELEMENTS = frozenset({"pre", "textarea"})
+RAW_TEXT_ELEMENTS = frozenset({"script", "style"})
+# Whitespace-separated list attributes, normalized to single spaces.
+UNIVERSAL_LIST_ATTRIBUTES = frozenset({"class", "accesskey", "dropzone"})
+LIST_ATTRIBUTES = {
+    tag: UNIVERSAL_LIST_ATTRIBUTES | frozenset(names)
+    for tag, names in {
+        "a": {"rel", "rev"},
+        "link": {"rel", "rev"},
+        "td": {"headers"},
+        "th": {"headers"},
+        "form": {"accept-charset"},
+        "object": {"archive"},
+        "area": {"rel"},
+        "icon": {"sizes"},
+        "iframe": {"sandbox"},
+        "output": {"for"},
+    }.items()
+}
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+OUTPUT_ENCODING = "utf-8"
+
+NONWHITESPACE_RE = re.compile(r"\S+")
+WHITESPACE_RE = re.compile(f"[{ASCII_SPACES}]+")
+ESCAPE_RE = re.compile("[&<>]")
+ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+META_CHARSET_RE = re.compile(r"((^|;)\s*charset=)([^;]*)", re.M)
+DECIMAL_REFERENCE_RE = re.compile("^([0-9]+)(.*)")
+HEX_REFERENCE_RE = re.compile("^([0-9a-f]+)(.*)")
+
+# Named references with or without the trailing semicolon.
+ENTITIES = {name.removesuffix(";"): character for name, character in sorted(html5.items(), reverse=True)}
+
+# Numeric references to C1 controls are read as Windows-1252, as browsers do.
+WINDOWS_1252 = {
+    number: bytes([number]).decode("cp1252")
+    for number in range(0x80, 0xA0)
+    if number not in (0x81, 0x8D, 0x8F, 0x90, 0x9D)
+}
+NONCHARACTERS = frozenset(
+    [*range(0xFDD0, 0xFDF0)] + [plane * 0x10000 + offset for plane in range(17) for offset in (0xFFFE, 0xFFFF)]
+)
+
+
+def escape(text):
+    return ESCAPE_RE.sub(lambda match: ESCAPES[match.group()], text)
+
+
+def quote_attribute(value):
+    value = escape(value)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', "&quot;") + '"'
+
+
+def compact_style(style):
+    """``style`` without empty declarations or the spaces around ``:`` and ``;``."""
+    declarations = []
+    for declaration in style.split(";"):
+        name, colon, value = declaration.partition(":")
+        if colon and name.strip() and value.strip():
+            declarations.append(f"{name.strip()}:{value.strip()}")
+    return ";".join(declarations)
+
+
+def numeric_reference(name):
+    """Decode the digits of ``&#...;``; returns ``(text, trailing data)``."""
+    base, pattern = 10, DECIMAL_REFERENCE_RE
+    if name[:1] in ("x", "X"):
+        name, base, pattern = name[1:], 16, HEX_REFERENCE_RE
+    extra = ""
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return "", name
+        number, extra = int(match.group(1), base), match.group(2)
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd", extra
+    if number in NONCHARACTERS:
+        return chr(number), extra
+    return WINDOWS_1252.get(number, chr(number)), extra
+
+
+class ImageRewriter(HTMLParser):
+    def __init__(self, rewrite_image, minify=False):
+        super().__init__(convert_charrefs=False)
+        self.rewrite_image = rewrite_image
+        self.minify = minify
+        self.output = []
+        self.text = []
+        self.open_tags = []
+        self.open_counts = Counter()
+        self.preserving_whitespace = 0
+        self.closed_void_elements = []
+
+    def result(self):
+        self.flush_text()
+        while self.open_tags:
+            self.pop_tag()
+        return "".join(self.output)
+
+    def flush_text(self, prefix="", suffix="", escaped=True):
+        if not self.text:
+            return
+        text = self.text[0] if len(self.text) == 1 else "".join(self.text)
+        self.text = []
+        raw = self.open_tags and self.open_tags[-1] in RAW_TEXT_ELEMENTS
+        if self.minify and escaped and not raw and not self.preserving_whitespace:
+            text = WHITESPACE_RE.sub(" ", text)
+        elif not self.preserving_whitespace and not text.strip(ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        if escaped and not raw:
+            text = escape(text)
+        self.output.append(f"{prefix}{text}{suffix}")
+
+    def write_special(self, data, prefix, suffix):
+        self.flush_text()
+        self.text.append(data)
+        self.flush_text(prefix, suffix, escaped=False)
+
+    def pop_tag(self):
+        tag = self.open_tags.pop()
+        self.open_counts[tag] -= 1
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self.preserving_whitespace -= 1
+        self.output.append(f"</{tag}>")
+
+    def handle_starttag(self, tag, attrs, closes_itself=True):
+        if self.text:
+            self.flush_text()
+        markup = ""
+        if attrs or tag == "img":
+            attributes = {}
+            for name, value in attrs:
+                attributes[name] = "" if value is None else value
+            for name in LIST_ATTRIBUTES.get(tag, UNIVERSAL_LIST_ATTRIBUTES).intersection(attributes):
+                attributes[name] = " ".join(NONWHITESPACE_RE.findall(attributes[name]))
+            if self.minify and "style" in attributes:
+                attributes["style"] = compact_style(attributes["style"])
+                if not attributes["style"]:
+                    del attributes["style"]
+            if tag == "meta":
+                self.substitute_meta_charset(attributes)
+            elif tag == "img":
+                self.rewrite_image(attributes)
+            markup = "".join(f" {name}={quote_attribute(value)}" for name, value in sorted(attributes.items()))
+        if tag in VOID_ELEMENTS:
+            self.output.append(f"<{tag}{markup}/>")
+            if closes_itself:
+                self.closed_void_elements.append(tag)
+            return
+        self.output.append(f"<{tag}{markup}>")
+        self.open_tags.append(tag)
+        self.open_counts[tag] += 1
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self.preserving_whitespace += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, closes_itself=False)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag, after_start=True)
+
+    def handle_endtag(self, tag, after_start=False):
+        if not after_start and tag in self.closed_void_elements:
+            self.closed_void_elements.remove(tag)
+            return
+        if self.text:
+            self.flush_text()
+        if not self.open_counts[tag]:
+            return
+        while self.open_tags[-1] != tag:
+            self.pop_tag()
+        self.pop_tag()
+
+    @staticmethod
+    def substitute_meta_charset(attributes):
+        # The declared encoding is replaced by the one the output is in.
+        if "charset" in attributes:
+            attributes["charset"] = OUTPUT_ENCODING
+        elif "content" in attributes and attributes.get("http-equiv", "").lower() == "content-type":
+            attributes["content"] = META_CHARSET_RE.sub(
+                lambda match: match.group(1) + OUTPUT_ENCODING, attributes["content"]
+            )
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+    def handle_charref(self, name):
+        self.text.extend(numeric_reference(name))
+
+    def handle_entityref(self, name):
+        self.text.append(ENTITIES.get(name, f"&{name}"))
+
+    def handle_comment(self, data):
+        if self.minify:
+            return
+        self.write_special(data, "<!--", "-->")
+
+    def handle_decl(self, decl):
+        self.write_special(decl[len("DOCTYPE "):], "<!DOCTYPE ", ">\n")
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.write_special(data[len("CDATA["):], "<![CDATA[", "]]>")
+        else:
+            self.write_special(data, "<?", "?>")
+
+    def handle_pi(self, data):
+        self.write_special(data, "<?", ">")
+
+
+def rewrite_images(html, rewrite_image, minify=False):
+    """Return ``html`` normalized as BeautifulSoup would, with
+    ``rewrite_image(attributes)`` applied to the attribute dict of every
+    ``<img>``."""
+    parser = ImageRewriter(rewrite_image, minify)
+    parser.feed(html)
+    parser.close()
+    return parser.result()
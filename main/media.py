@@ -0,0 +1,151 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+
+# Names written by hashed_name(); a bare run of hex digits could also be a
+# timestamp or counter, and such a file may still be replaced.
+HASH_MARKER = ".hash-"
+HASHED_NAME_RE = re.compile(r"\.hash-[0-9a-f]{16,64}\.[A-Za-z0-9]+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def hashed_name(stem, digest, extension):
+    """A file name ``main.media`` serves as immutable: only use it for
+    content whose hash is ``digest``."""
+    return f"{stem}{HASH_MARKER}{digest}{extension}"
+
+
+def is_hashed_name(path):
+    return bool(HASHED_NAME_RE.search(os.path.basename(path)))
+
+
+def media_cache_control(path):
+    if is_hashed_name(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single byte range, ``None`` to serve the
+    whole file, or ``False`` when the range cannot be satisfied."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: a full response is always allowed.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _if_range_passes(request, etag, last_modified):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith("W/"):
+        # If-Range only takes strong validators.
+        return False
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("Media file not found")
+    try:
+        file_stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Media file not found")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("Media file not found")
+
+    size = file_stat.st_size
+    last_modified = int(file_stat.st_mtime)
+    etag = quote_etag(f"{file_stat.st_mtime_ns:x}-{size:x}")
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    def with_validators(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = media_cache_control(path)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return with_validators(not_modified)
+
+    offload = getattr(settings, "MEDIA_OFFLOAD", "")
+    if offload == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(path)
+        return with_validators(response)
+    if offload == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return with_validators(response)
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and _if_range_passes(request, etag, last_modified):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return with_validators(response)
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, length) if request.method == "GET" else iter(()),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    return with_validators(response)
@@ -0,0 +1,238 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FLUSH_INTERVAL = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+
+_current_timings = ContextVar("corvidian_request_timings", default=None)
+
+
+def get_metrics_dir():
+    return getattr(settings, "METRICS_DIR", "") or os.path.join(tempfile.gettempdir(), "corvidian-metrics")
+
+
+class RequestTimings:
+    """Per-request phase durations (seconds) and cache lookup results."""
+
+    def __init__(self):
+        self.phases = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - start)
+
+    def server_timing(self, total):
+        parts = [f"{phase};dur={duration * 1000:.2f}" for phase, duration in self.phases.items()]
+        if self.cache_hits or self.cache_misses:
+            if not self.cache_misses:
+                result = "hit"
+            elif not self.cache_hits:
+                result = "miss"
+            else:
+                result = "partial"
+            parts.append(f'cache-result;desc="{result}"')
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+
+def end_request(token):
+    _current_timings.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase``, less the time of the
+    queries it ran, which are already counted under ``db``."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    db_before = timings.phases.get("db", 0.0)
+    try:
+        yield
+    finally:
+        db_time = timings.phases.get("db", 0.0) - db_before
+        timings.add(phase, time.perf_counter() - start - db_time)
+
+
+def record_cache(hit):
+    timings = _current_timings.get()
+    if timings is None:
+        return
+    if hit:
+        timings.cache_hits += 1
+    else:
+        timings.cache_misses += 1
+
+
+class MetricsRegistry:
+    """Per-worker aggregates, periodically written to a shared directory.
+
+    Each gunicorn worker writes its own ``worker-<pid>.json`` file so the
+    metrics endpoint can merge the totals of every worker on the host.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._phases = {}
+        self._cache = {}
+        self._last_flush = 0.0
+
+    def observe(self, endpoint, method, duration, timings):
+        with self._lock:
+            per_method = self._latency.setdefault(endpoint, {})
+            series = per_method.setdefault(method, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += duration
+            series["count"] += 1
+
+            phases = self._phases.setdefault(endpoint, {})
+            for phase, phase_duration in timings.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + phase_duration
+
+            if timings.cache_hits or timings.cache_misses:
+                counts = self._cache.setdefault(endpoint, {"hit": 0, "miss": 0})
+                counts["hit"] += timings.cache_hits
+                counts["miss"] += timings.cache_misses
+        self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps({
+                "latency": self._latency,
+                "phases": self._phases,
+                "cache": self._cache,
+            }))
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        directory = get_metrics_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"worker-{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write metrics: {e}")
+
+
+registry = MetricsRegistry()
+
+
+def collect_worker_snapshots():
+    own_file = f"worker-{os.getpid()}.json"
+    snapshots = [registry.snapshot()]
+    directory = get_metrics_dir()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return snapshots
+    for name in names:
+        if not name.endswith(".json") or name == own_file:
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    merged = {"latency": {}, "phases": {}, "cache": {}}
+    for snapshot in snapshots:
+        for endpoint, per_method in snapshot.get("latency", {}).items():
+            target_methods = merged["latency"].setdefault(endpoint, {})
+            for method, series in per_method.items():
+                target = target_methods.setdefault(method, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+                for index, value in enumerate(series["buckets"][:len(LATENCY_BUCKETS)]):
+                    target["buckets"][index] += value
+                target["sum"] += series["sum"]
+                target["count"] += series["count"]
+        for endpoint, phases in snapshot.get("phases", {}).items():
+            target = merged["phases"].setdefault(endpoint, {})
+            for phase, duration in phases.items():
+                target[phase] = target.get(phase, 0.0) + duration
+        for endpoint, counts in snapshot.get("cache", {}).items():
+            target = merged["cache"].setdefault(endpoint, {"hit": 0, "miss": 0})
+            target["hit"] += counts.get("hit", 0)
+            target["miss"] += counts.get("miss", 0)
+    return merged
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(merged=None):
+    if merged is None:
+        merged = merge_snapshots(collect_worker_snapshots())
+    lines = [
+        "# HELP corvidian_request_duration_seconds Request latency per endpoint.",
+        "# TYPE corvidian_request_duration_seconds histogram",
+    ]
+    for endpoint, per_method in sorted(merged["latency"].items()):
+        for method, series in sorted(per_method.items()):
+            labels = f'endpoint="{_label(endpoint)}",method="{_label(method)}"'
+            for bound, value in zip(LATENCY_BUCKETS, series["buckets"]):
+                lines.append(f'corvidian_request_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'corvidian_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f"corvidian_request_duration_seconds_sum{{{labels}}} {series['sum']}")
+            lines.append(f"corvidian_request_duration_seconds_count{{{labels}}} {series['count']}")
+
+    lines += [
+        "# HELP corvidian_request_phase_seconds_total Time spent per request phase.",
+        "# TYPE corvidian_request_phase_seconds_total counter",
+    ]
+    for endpoint, phases in sorted(merged["phases"].items()):
+        for phase, duration in sorted(phases.items()):
+            lines.append(f'corvidian_request_phase_seconds_total{{endpoint="{_label(endpoint)}",phase="{_label(phase)}"}} {duration}')
+
+    lines += [
+        "# HELP corvidian_cache_requests_total Cache lookups per endpoint by result.",
+        "# TYPE corvidian_cache_requests_total counter",
+    ]
+    for endpoint, counts in sorted(merged["cache"].items()):
+        for result in ("hit", "miss"):
+            lines.append(f'corvidian_cache_requests_total{{endpoint="{_label(endpoint)}",result="{result}"}} {counts[result]}')
+
+    lines += [
+        "# HELP corvidian_cache_hit_ratio Cache hit ratio per endpoint.",
+        "# TYPE corvidian_cache_hit_ratio gauge",
+    ]
+    for endpoint, counts in sorted(merged["cache"].items()):
+        total = counts["hit"] + counts["miss"]
+        ratio = counts["hit"] / total if total else 0.0
+        lines.append(f'corvidian_cache_hit_ratio{{endpoint="{_label(endpoint)}"}} {ratio}')
+
+    return "\n".join(lines) + "\n"
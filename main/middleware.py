@@ -0,0 +1,89 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .cdn import make_private
+from .metrics import end_request, registry, start_request
+from .routers import PIN_COOKIE, end_routing, replica_configured, start_routing
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class RequestTimingMiddleware:
+    """Adds a ``Server-Timing`` header and feeds the per-endpoint metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = start_request()
+        request._timings = timings
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            end_request(token)
+        total = time.perf_counter() - start
+        response["Server-Timing"] = timings.server_timing(total)
+        registry.observe(self._endpoint(request), request.method, total, timings)
+        return response
+
+    def process_template_response(self, request, response):
+        timings = getattr(request, "_timings", None)
+        if timings is not None:
+            render_start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add("render", time.perf_counter() - render_start)
+            )
+        return response
+
+    @staticmethod
+    def _endpoint(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "unmatched"
+        return match.route or match.view_name
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes for the replica router: a request that wrote to the
+    database pins its client to the primary for REPLICA_PIN_SECONDS, long
+    enough for the replica to catch up."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+        routing, token = start_routing(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_routing(token)
+        # A safe request that wrote only refreshed derived data; pinning it
+        # would set a cookie on cacheable public responses.
+        if routing.wrote and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                secure=request.is_secure(), httponly=True, samesite="Lax",
+            )
+        return response
+
+
+class EdgeCacheMiddleware:
+    """Runs outside every layer that may set a cookie (sessions, CSRF, the
+    replica pin) and keeps such responses out of shared caches."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return make_private(self.get_response(request))
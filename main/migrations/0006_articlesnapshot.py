@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_alter_article_options_article_excerpt_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('published_at', models.DateField()),
+                ('summary', models.JSONField()),
+                ('detail', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='main.article')),
+            ],
+            options={
+                'ordering': ['-published_at', '-article'],
+                'indexes': [models.Index(fields=['-published_at', '-article'], name='main_articl_publish_6a2881_idx')],
+            },
+        ),
+    ]
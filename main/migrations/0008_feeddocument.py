@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_articleindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('content', models.TextField()),
+                ('etag', models.CharField(max_length=64)),
+                ('last_modified', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='articlesnapshot',
+            name='atom_entry',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articlesnapshot',
+            name='rss_item',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='articlesnapshot',
+            name='sitemap_entry',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
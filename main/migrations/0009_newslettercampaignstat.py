@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_feeddocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaignStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('open', 'Open'), ('click', 'Click')], max_length=10)),
+                ('url', models.TextField(blank=True, default='')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='main.newslettercampaign')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'event', 'url'), name='unique_campaign_stat')],
+            },
+        ),
+    ]
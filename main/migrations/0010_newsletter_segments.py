@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_newslettercampaignstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newslettercampaign',
+            name='segment_source',
+            field=models.CharField(blank=True, default='', help_text='Only send to subscribers who signed up from this source.', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='newslettercampaign',
+            name='segment_subscribed_after',
+            field=models.DateTimeField(blank=True, help_text='Only send to subscribers who signed up on or after this time.', null=True),
+        ),
+        migrations.AddField(
+            model_name='newslettercampaign',
+            name='segment_subscribed_before',
+            field=models.DateTimeField(blank=True, help_text='Only send to subscribers who signed up before this time.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['source', 'id'], name='main_subscriber_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['created_at', 'id'], name='main_subscriber_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_newsletter_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='optimized_content',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_url_hashes(apps, schema_editor):
+    NewsletterCampaignStat = apps.get_model('main', 'NewsletterCampaignStat')
+    for stat in NewsletterCampaignStat.objects.only('pk', 'url').iterator():
+        NewsletterCampaignStat.objects.filter(pk=stat.pk).update(url_hash=hashlib.sha256(stat.url.encode()).hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_article_optimized_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newslettercampaignstat',
+            name='url_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_url_hashes, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='newslettercampaignstat',
+            name='unique_campaign_stat',
+        ),
+        migrations.AddConstraint(
+            model_name='newslettercampaignstat',
+            constraint=models.UniqueConstraint(fields=('campaign', 'event', 'url_hash'), name='unique_campaign_stat'),
+        ),
+    ]
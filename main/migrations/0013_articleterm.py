@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_article_terms(apps, schema_editor):
+    ArticleIndex = apps.get_model('main', 'ArticleIndex')
+    ArticleTerm = apps.get_model('main', 'ArticleTerm')
+    for article_id, terms in ArticleIndex.objects.values_list('article_id', 'terms').iterator():
+        ArticleTerm.objects.bulk_create(
+            [ArticleTerm(article_id=article_id, term=term) for term in terms if len(term) <= 100],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_campaign_stat_url_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.article')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'article'), name='unique_article_term')],
+            },
+        ),
+        migrations.RunPython(fill_article_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Replace
+
+
+def use_dc_creator(apps, schema_editor):
+    ArticleSnapshot = apps.get_model('main', 'ArticleSnapshot')
+    FeedDocument = apps.get_model('main', 'FeedDocument')
+    ArticleSnapshot.objects.update(
+        rss_item=Replace(Replace('rss_item', Value('<author>'), Value('<dc:creator>')), Value('</author>'), Value('</dc:creator>')),
+    )
+    # Generated again on first use.
+    FeedDocument.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_articleterm'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_dc_creator, migrations.RunPython.noop),
+    ]
@@ -1,26 +1,110 @@
 from django.conf import settings
+from django.core import signing
 from django.core.cache import cache
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.files.base import ContentFile
 from django.db import models
+from django.db.models import Q
+from django.dispatch import Signal
 from django.utils import timezone
 from django.utils.html import escape, strip_tags
 from django.utils.text import slugify
 from ckeditor_uploader.fields import RichTextUploadingField
-from PIL import Image
-from bs4 import BeautifulSoup
-import io
-import base64
+from .cache_tags import ARTICLE_LIST_TAG, article_tag, newsletter_tag, tagged_key, tagged_keys
+from .markup import rewrite_images
+from .metrics import timed
+from .rendition import optimize_article_html
+from .templating import CompiledTemplate, slot
+import hashlib
 import os
 
 
 ARTICLE_LIST_CACHE_KEY = "articles:list"
+ARTICLE_DETAIL_CACHE_KEY = "articles:detail:{slug}"
 CACHE_TIMEOUT = getattr(settings, "CACHE_TTL", 300)
-NEWSLETTER_HTML_CACHE_KEY = "newsletter:content:{pk}:html"
+NEWSLETTER_HTML_CACHE_KEY = "newsletter:content:{model}:{pk}:html"
+NEWSLETTER_PERSONALIZED_HTML_CACHE_KEY = "newsletter:content:{model}:{pk}:html:personalized"
+UNSUBSCRIBE_SALT = "newsletter.unsubscribe"
 
 
-def article_detail_cache_key(slug):
-    return f"articles:detail:{slug}"
+def get_site_url(request=None):
+    site_url = getattr(settings, 'SITE_URL', '') or ''
+    if not site_url and request:
+        site_url = request.build_absolute_uri('/')
+    return (site_url or 'http://localhost:8000').rstrip('/')
+
+
+def make_unsubscribe_token(email):
+    return signing.dumps(email, salt=UNSUBSCRIBE_SALT, compress=True)
+
+
+def read_unsubscribe_token(token):
+    return signing.loads(token, salt=UNSUBSCRIBE_SALT)
+
+
+def unsubscribe_url(email, site_url):
+    return f"{site_url}/api/unsubscribe/{make_unsubscribe_token(email)}/"
+
+
+def _fieldset_suffix(fields):
+    return f":fields={','.join(sorted(fields))}" if fields else ""
+
+
+def article_detail_cache_key(slug, fields=None, raw_content=False):
+    base = f"{ARTICLE_DETAIL_CACHE_KEY.format(slug=slug)}{_fieldset_suffix(fields)}"
+    if raw_content:
+        base = f"{base}:content=raw"
+    return tagged_key(base, [article_tag(slug)])
+
+
+def article_detail_cache_keys(slugs):
+    """``{cache key: slug}`` for the full detail payloads of ``slugs``."""
+    bases = {ARTICLE_DETAIL_CACHE_KEY.format(slug=slug): slug for slug in slugs}
+    keys = tagged_keys({base: [article_tag(slug)] for base, slug in bases.items()})
+    return {keys[base]: slug for base, slug in bases.items()}
+
+
+def article_list_cache_key(page=1, fields=None):
+    # Every list page and field set carries the one list tag, so a single
+    # invalidation drops all of them.
+    return tagged_key(f"{ARTICLE_LIST_CACHE_KEY}{_fieldset_suffix(fields)}:page:{page}", [ARTICLE_LIST_TAG])
+
+
+# Sent by TaggedQuerySet after update() and bulk_create(), which bypass
+# save() and post_save. ``stale_tags`` are the cache tags the updated rows
+# had before the update; receivers live in signals.py.
+bulk_written = Signal()
+
+
+class TaggedQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        pks = list(self.values_list("pk", flat=True))
+        stale_tags = self.model.cache_tags(pks) if pks else []
+        rows = super().update(**kwargs)
+        if pks:
+            bulk_written.send(sender=self.model, pks=pks, stale_tags=stale_tags)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        if pks:
+            bulk_written.send(sender=self.model, pks=pks, stale_tags=[])
+        return objs
+
+    bulk_create.alters_data = True
+
+
+class ArticleQuerySet(TaggedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for article in objs:
+            article.fill_derived_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    bulk_create.alters_data = True
 
 
 class Article(models.Model):
@@ -30,10 +114,16 @@ class Article(models.Model):
     published_at = models.DateField(db_index=True)
     cover_image = models.ImageField(upload_to='wawasan/covers/', blank=True, null=True)
     content = RichTextUploadingField()
+    # What the detail API serves as ``content``; see main.rendition.
+    optimized_content = models.TextField(blank=True, default="", editable=False)
     excerpt = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ArticleQuerySet.as_manager()
+
+    DERIVED_FIELDS = ('slug', 'excerpt', 'optimized_content')
+
     class Meta:
         ordering = ['-published_at']
         indexes = [
@@ -41,29 +131,105 @@ class Article(models.Model):
         ]
 
     def save(self, *args, **kwargs):
-        old_slug = None
+        # The post_save receiver drops the cache of the old URL on renames.
+        self._previous_slug = None
         if self.pk:
-            old_slug = Article.objects.filter(pk=self.pk).values_list('slug', flat=True).first()
+            self._previous_slug = Article.objects.filter(pk=self.pk).values_list('slug', flat=True).first()
+        self.fill_derived_fields()
+        super().save(*args, **kwargs)
+
+    def fill_derived_fields(self):
         if not self.slug:
             self.slug = slugify(self.title)
         plain = strip_tags(self.content or "")
         self.excerpt = f"{plain[:200]}..." if len(plain) > 200 else plain
-        super().save(*args, **kwargs)
-        cache.delete(ARTICLE_LIST_CACHE_KEY)
-        cache.delete(article_detail_cache_key(self.slug))
-        if old_slug and old_slug != self.slug:
-            cache.delete(article_detail_cache_key(old_slug))
-
-    def delete(self, *args, **kwargs):
-        slug = self.slug
-        super().delete(*args, **kwargs)
-        cache.delete(ARTICLE_LIST_CACHE_KEY)
-        cache.delete(article_detail_cache_key(slug))
+        self.optimized_content = optimize_article_html(self.content or "")
+
+    def refresh_derived_fields(self):
+        """Recompute the derived fields of a row written without save() and
+        store the ones that changed. Returns whether any did."""
+        before = {name: getattr(self, name) for name in self.DERIVED_FIELDS}
+        self.fill_derived_fields()
+        changed = {name: getattr(self, name) for name in self.DERIVED_FIELDS if getattr(self, name) != before[name]}
+        if changed:
+            # The plain QuerySet.update, so this does not signal bulk_written again.
+            models.QuerySet.update(Article.objects.filter(pk=self.pk), **changed)
+        return bool(changed)
+
+    @classmethod
+    def cache_tags(cls, pks):
+        slugs = cls.objects.filter(pk__in=pks).values_list('slug', flat=True)
+        return [ARTICLE_LIST_TAG, *(article_tag(slug) for slug in slugs)]
 
     def __str__(self):
         return self.title
 
 
+class ArticleSnapshot(models.Model):
+    """Serialized API payloads of an article, rewritten on every save."""
+
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, related_name='snapshot')
+    slug = models.SlugField(unique=True)
+    published_at = models.DateField()
+    summary = models.JSONField()
+    detail = models.JSONField()
+    sitemap_entry = models.TextField(blank=True, default="")
+    rss_item = models.TextField(blank=True, default="")
+    atom_entry = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-published_at', '-article']
+        indexes = [
+            models.Index(fields=['-published_at', '-article']),
+        ]
+
+    def __str__(self):
+        return self.slug
+
+
+class ArticleIndex(models.Model):
+    """Neighbours and top related articles, maintained on every save."""
+
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, related_name='index')
+    terms = models.JSONField(default=dict)
+    previous_article = models.ForeignKey(Article, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    next_article = models.ForeignKey(Article, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    related = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Index for {self.article_id}"
+
+
+class ArticleTerm(models.Model):
+    """The terms of each ArticleIndex row, one per row here, so the articles
+    sharing a term are found without reading every index."""
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'article'], name='unique_article_term'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class FeedDocument(models.Model):
+    """A generated sitemap or feed, stored with its validators."""
+
+    name = models.CharField(max_length=50, unique=True)
+    content = models.TextField()
+    etag = models.CharField(max_length=64)
+    last_modified = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+
 class ConsultationLead(models.Model):
     name = models.CharField(max_length=150)
     email = models.EmailField()
@@ -81,18 +247,62 @@ class NewsletterSubscriber(models.Model):
     source = models.CharField(max_length=100, default="footer")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Campaign segments walk the subscribers in pk order within a
+            # source, or in (created_at, pk) order through a sign-up window
+            # (see iter_subscriber_emails).
+            models.Index(fields=["source", "id"], name="main_subscriber_source_idx"),
+            models.Index(fields=["created_at", "id"], name="main_subscriber_created_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
 
+def iter_subscriber_emails(subscribers, chunk_size=None, by_sign_up=False):
+    """Yield the emails in ``subscribers`` a chunk at a time, ordered by pk,
+    or by ``(created_at, pk)`` with ``by_sign_up`` so that a sign-up window
+    is read along main_subscriber_created_idx.
+
+    Each chunk is a separate query for the rows after the last one, so
+    memory stays flat however many subscribers there are, no cursor is held
+    open while mail goes out, and subscribers who join mid-send are still
+    reached.
+    """
+    chunk_size = chunk_size or getattr(settings, "NEWSLETTER_SEND_CHUNK_SIZE", 1000)
+    ordering = ("created_at", "pk") if by_sign_up else ("pk",)
+    after = subscribers
+    while True:
+        chunk = list(after.order_by(*ordering).values_list(*ordering, "email")[:chunk_size])
+        for row in chunk:
+            yield row[-1]
+        if len(chunk) < chunk_size:
+            return
+        if by_sign_up:
+            created_at, pk, _ = chunk[-1]
+            after = subscribers.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+        else:
+            after = subscribers.filter(pk__gt=chunk[-1][0])
+
+
 class NewsletterContent(models.Model):
     subject = models.CharField(max_length=255)
     body = RichTextUploadingField(blank=True, null=True)
     hero_image = models.ImageField(upload_to="newsletter/messages/", blank=True, null=True)
 
+    objects = TaggedQuerySet.as_manager()
+
+    # Saves that touch none of these leave the rendered HTML cached.
+    RENDERED_FIELDS = frozenset({"subject", "body", "hero_image"})
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def cache_tags(cls, pks):
+        return [newsletter_tag(cls, pk) for pk in pks]
+
     def save(self, *args, **kwargs):
         if self.hero_image and hasattr(self.hero_image, 'file'):
             try:
@@ -106,10 +316,13 @@ class NewsletterContent(models.Model):
                 print(f"Image compression failed: {e}")
         
         super().save(*args, **kwargs)
-        if self.pk:
-            cache.delete(NEWSLETTER_HTML_CACHE_KEY.format(pk=self.pk))
 
     def _compress_image(self, image_field):
+        # Pillow is only needed when an image is uploaded; keep it out of
+        # every worker's boot.
+        import io
+        from PIL import Image
+
         try:
             img = Image.open(image_field)
             
@@ -140,54 +353,83 @@ class NewsletterContent(models.Model):
             print(f"Error compressing image: {e}")
             return image_field
 
-    def build_html_body(self, request=None):
-        cache_key = NEWSLETTER_HTML_CACHE_KEY.format(pk=self.pk) if self.pk else None
+    def build_html_body(self, request=None, personalized=False):
+        """Render the email HTML.
+
+        With ``personalized=True`` the footer carries ``email`` and
+        ``unsubscribe_url`` slots for ``compile_personalized_bodies``.
+        """
+        key_template = NEWSLETTER_PERSONALIZED_HTML_CACHE_KEY if personalized else NEWSLETTER_HTML_CACHE_KEY
+        cache_key = None
+        if self.pk:
+            base = key_template.format(model=self._meta.model_name, pk=self.pk)
+            cache_key = tagged_key(base, [newsletter_tag(type(self), self.pk)])
         if cache_key:
             cached_html = cache.get(cache_key)
             if cached_html:
                 return cached_html
-        site_url = getattr(settings, 'SITE_URL', '') or ''
-        if not site_url and request:
-            site_url = request.build_absolute_uri('/')
-        site_url = (site_url or 'http://localhost:8000').rstrip('/')
+        footer_extra = ""
+        if personalized:
+            footer_extra = f'<p style="margin:10px 0 0 0;color:#999999;">Dikirim ke {slot("email")}. <a href="{slot("unsubscribe_url")}" style="color:#999999;">Berhenti berlangganan</a></p>'
+        with timed("html"):
+            email_html = self._render_html_body(request, footer_extra)
+        if cache_key:
+            cache.set(cache_key, email_html, CACHE_TIMEOUT)
+        return email_html
+
+    def compile_personalized_bodies(self, request=None):
+        """Render once and return ``(html, plain)`` templates to fill in per
+        recipient with ``email`` and ``unsubscribe_url``."""
+        html_body = self.build_html_body(request, personalized=True)
+        plain_body = self.build_plain_body() or strip_tags(html_body or "") or ""
+        plain_body = f"{plain_body}\n\n--\nBerhenti berlangganan: {slot('unsubscribe_url')}"
+        return CompiledTemplate(self._prepare_personalized_html(html_body, request)), CompiledTemplate(plain_body)
+
+    def _prepare_personalized_html(self, html_body, request=None):
+        return html_body
+
+    def _render_html_body(self, request=None, footer_extra=""):
+        import base64
+
+        site_url = get_site_url(request)
         is_localhost = 'localhost' in site_url or '127.0.0.1' in site_url
+
+        def rewrite_image(img):
+            src = img.get('src', '')
+            if not src:
+                return
+            if src.startswith('data:'):
+                return
+            if is_localhost:
+                try:
+                    file_path = src.replace('/media/', '').replace('media/', '').lstrip('/')
+                    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+                    if os.path.exists(full_path):
+                        with open(full_path, 'rb') as f:
+                            img_data = f.read()
+                        base64_data = base64.b64encode(img_data).decode()
+                        mime = 'image/jpeg'
+                        lowered = full_path.lower()
+                        if lowered.endswith('.png'):
+                            mime = 'image/png'
+                        elif lowered.endswith('.gif'):
+                            mime = 'image/gif'
+                        img['src'] = f"data:{mime};base64,{base64_data}"
+                except Exception:
+                    return
+            else:
+                if not src.startswith('http'):
+                    img['src'] = f"{site_url}/{src.lstrip('/')}"
+            img['style'] = 'display:block;max-width:100%;width:auto;height:auto;border:0;outline:none;text-decoration:none;margin:10px 0;'
+            if img.get('width'):
+                del img['width']
+            if img.get('height'):
+                del img['height']
+
         content_html = self.body or ""
         if content_html:
             try:
-                soup = BeautifulSoup(content_html, 'html.parser')
-                images = soup.find_all('img')
-                for img in images:
-                    src = img.get('src', '')
-                    if not src:
-                        continue
-                    if src.startswith('data:'):
-                        continue
-                    if is_localhost:
-                        try:
-                            file_path = src.replace('/media/', '').replace('media/', '').lstrip('/')
-                            full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-                            if os.path.exists(full_path):
-                                with open(full_path, 'rb') as f:
-                                    img_data = f.read()
-                                base64_data = base64.b64encode(img_data).decode()
-                                mime = 'image/jpeg'
-                                lowered = full_path.lower()
-                                if lowered.endswith('.png'):
-                                    mime = 'image/png'
-                                elif lowered.endswith('.gif'):
-                                    mime = 'image/gif'
-                                img['src'] = f"data:{mime};base64,{base64_data}"
-                        except Exception:
-                            continue
-                    else:
-                        if not src.startswith('http'):
-                            img['src'] = f"{site_url}/{src.lstrip('/')}"
-                    img['style'] = 'display:block;max-width:100%;width:auto;height:auto;border:0;outline:none;text-decoration:none;margin:10px 0;'
-                    if img.get('width'):
-                        del img['width']
-                    if img.get('height'):
-                        del img['height']
-                content_html = str(soup)
+                content_html = rewrite_images(content_html, rewrite_image)
             except Exception:
                 pass
         hero_markup = ""
@@ -205,9 +447,7 @@ class NewsletterContent(models.Model):
             except Exception:
                 hero_markup = ""
         body_content = f"{hero_markup}{content_html}" if hero_markup or content_html else ""
-        email_html = '<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>' + escape(self.subject) + '</title></head><body style="margin:0;padding:0;background-color:#f4f4f4;font-family:Arial,sans-serif;"><table role="presentation" style="width:100%;border-collapse:collapse;background-color:#f4f4f4;"><tr><td align="center" style="padding:20px 0;"><table role="presentation" style="max-width:600px;width:100%;background-color:#ffffff;border-collapse:collapse;box-shadow:0 2px 4px rgba(0,0,0,0.1);"><tr><td style="padding:30px;color:#333333;line-height:1.6;">' + body_content + '</td></tr><tr><td style="padding:20px 30px;background-color:#f9f9f9;text-align:center;color:#666666;font-size:12px;border-top:1px solid #eeeeee;"><p style="margin:0 0 10px 0;">Corvidian Newsletter</p><p style="margin:0;"><a href="https://www.corvidian.io" style="color:#007bff;text-decoration:none;">www.corvidian.io</a></p></td></tr></table></td></tr></table></body></html>'
-        if cache_key:
-            cache.set(cache_key, email_html, CACHE_TIMEOUT)
+        email_html = '<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>' + escape(self.subject) + '</title></head><body style="margin:0;padding:0;background-color:#f4f4f4;font-family:Arial,sans-serif;"><table role="presentation" style="width:100%;border-collapse:collapse;background-color:#f4f4f4;"><tr><td align="center" style="padding:20px 0;"><table role="presentation" style="max-width:600px;width:100%;background-color:#ffffff;border-collapse:collapse;box-shadow:0 2px 4px rgba(0,0,0,0.1);"><tr><td style="padding:30px;color:#333333;line-height:1.6;">' + body_content + '</td></tr><tr><td style="padding:20px 30px;background-color:#f9f9f9;text-align:center;color:#666666;font-size:12px;border-top:1px solid #eeeeee;"><p style="margin:0 0 10px 0;">Corvidian Newsletter</p><p style="margin:0;"><a href="https://www.corvidian.io" style="color:#007bff;text-decoration:none;">www.corvidian.io</a></p>' + footer_extra + '</td></tr></table></td></tr></table></body></html>'
         return email_html
 
     def build_plain_body(self):
@@ -231,6 +471,16 @@ class NewsletterCampaign(NewsletterContent):
     is_sent = models.BooleanField(default=False)
     scheduled_for = models.DateTimeField(blank=True, null=True)
     sent_at = models.DateTimeField(blank=True, null=True)
+    segment_source = models.CharField(
+        max_length=100, blank=True, default="",
+        help_text="Only send to subscribers who signed up from this source.",
+    )
+    segment_subscribed_after = models.DateTimeField(
+        blank=True, null=True, help_text="Only send to subscribers who signed up on or after this time.",
+    )
+    segment_subscribed_before = models.DateTimeField(
+        blank=True, null=True, help_text="Only send to subscribers who signed up before this time.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -241,36 +491,99 @@ class NewsletterCampaign(NewsletterContent):
         status = "Sent" if self.is_sent else "Draft"
         return f"{self.subject} ({status})"
 
+    def _prepare_personalized_html(self, html_body, request=None):
+        from .tracking import add_tracking
+        if not self.pk:
+            return html_body
+        return add_tracking(html_body, self.pk, get_site_url(request))
+
+    def recipients(self):
+        subscribers = NewsletterSubscriber.objects.all()
+        if self.segment_source:
+            subscribers = subscribers.filter(source=self.segment_source)
+        if self.segment_subscribed_after:
+            subscribers = subscribers.filter(created_at__gte=self.segment_subscribed_after)
+        if self.segment_subscribed_before:
+            subscribers = subscribers.filter(created_at__lt=self.segment_subscribed_before)
+        return subscribers
+
     def send_to_subscribers(self, request=None):
         if self.is_sent:
             return 0
 
-        recipients = list(NewsletterSubscriber.objects.values_list("email", flat=True))
-        if not recipients:
+        recipients = self.recipients()
+        if not recipients.exists():
             return 0
 
-        html_body = self.build_html_body(request)
-        plain_body = self.build_plain_body() or strip_tags(html_body or "") or ""
+        html_template, plain_template = self.compile_personalized_bodies(request)
+        site_url = get_site_url(request)
+        connection = get_connection()
 
         sent_count = 0
-        for email in recipients:
-            try:
-                message = EmailMultiAlternatives(
-                    self.subject,
-                    plain_body or "",
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                )
-                if html_body:
-                    message.attach_alternative(html_body, "text/html")
-                message.send()
-                sent_count += 1
-            except Exception as e:
-                print(f"Failed to send to {email}: {e}")
-                continue
+        try:
+            # A source segment is served by main_subscriber_source_idx in pk
+            # order; a sign-up window alone by main_subscriber_created_idx.
+            by_sign_up = not self.segment_source and bool(self.segment_subscribed_after or self.segment_subscribed_before)
+            for email in iter_subscriber_emails(recipients, by_sign_up=by_sign_up):
+                try:
+                    url = unsubscribe_url(email, site_url)
+                    message = EmailMultiAlternatives(
+                        self.subject,
+                        plain_template.render({"email": email, "unsubscribe_url": url}),
+                        settings.DEFAULT_FROM_EMAIL,
+                        [email],
+                        connection=connection,
+                        headers={
+                            "List-Unsubscribe": f"<{url}>",
+                            "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
+                        },
+                    )
+                    message.attach_alternative(
+                        html_template.render({"email": escape(email), "unsubscribe_url": escape(url)}),
+                        "text/html",
+                    )
+                    message.send()
+                    sent_count += 1
+                except Exception as e:
+                    print(f"Failed to send to {email}: {e}")
+                    # Reconnect on the next message in case the SMTP session broke.
+                    connection.close()
+                    continue
+        finally:
+            connection.close()
 
         self.is_sent = True
         self.sent_at = timezone.now()
         self.save(update_fields=["is_sent", "sent_at"])
 
         return sent_count
+
+
+class NewsletterCampaignStat(models.Model):
+    EVENT_OPEN = "open"
+    EVENT_CLICK = "click"
+    EVENT_CHOICES = (
+        (EVENT_OPEN, "Open"),
+        (EVENT_CLICK, "Click"),
+    )
+
+    campaign = models.ForeignKey(NewsletterCampaign, on_delete=models.CASCADE, related_name="stats")
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    url = models.TextField(blank=True, default="")
+    # The unique constraint is on the digest: an index on the unbounded URL
+    # fails for long links (Postgres limits index rows to about 2.7 kB).
+    url_hash = models.CharField(max_length=64, editable=False)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "event", "url_hash"], name="unique_campaign_stat"),
+        ]
+
+    @staticmethod
+    def hash_url(url):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def __str__(self):
+        return f"{self.campaign_id} {self.event} {self.url}".strip()
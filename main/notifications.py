@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .buffering import BufferedFlusher
+from .mail import mail_executor, send_timeout
+
+
+ADMIN_DIGEST_INTERVAL = getattr(settings, "ADMIN_DIGEST_INTERVAL", 300)
+ADMIN_DIGEST_BATCH_SIZE = getattr(settings, "ADMIN_DIGEST_BATCH_SIZE", 50)
+
+
+class AdminDigestNotifier(BufferedFlusher):
+    """Sends one admin email per window instead of one per event."""
+
+    def flush_items(self, events):
+        receiver_email = settings.CONSULTATION_RECEIVER_EMAIL
+        if not receiver_email:
+            return
+
+        consultations = [e for e in events if e["kind"] == "consultation"]
+        subscribers = [e for e in events if e["kind"] == "subscriber"]
+
+        new_subscribers = sum(1 for e in subscribers if e["created"])
+
+        if len(consultations) == 1 and not subscribers:
+            subject = f"Konsultasi Baru dari {consultations[0]['name']}"
+        else:
+            subject = (
+                f"Ringkasan Corvidian: {len(consultations)} konsultasi baru, "
+                f"{new_subscribers} subscriber baru"
+            )
+
+        sections = []
+        for event in consultations:
+            sections.append(
+                f"[{event['created_at']:%Y-%m-%d %H:%M}] Konsultasi\n"
+                f"Nama: {event['name']}\n"
+                f"Email: {event['email']}\n"
+                f"Telepon: {event['phone']}\n"
+                f"Perusahaan: {event['company']}\n\n"
+                f"Pertanyaan:\n{event['question']}"
+            )
+        if subscribers:
+            lines = []
+            for event in subscribers:
+                note = "" if event["created"] else " (sudah terdaftar)"
+                lines.append(f"[{event['created_at']:%Y-%m-%d %H:%M}] {event['email']} - {event['source']}{note}")
+            sections.append("New Newsletter Subscribers\n" + "\n".join(lines))
+
+        message = EmailMessage(
+            subject,
+            "\n\n----------\n\n".join(sections),
+            settings.DEFAULT_FROM_EMAIL,
+            [receiver_email],
+        )
+        # Waits for the send, so a failure puts the events back for the next
+        # interval (see BufferedFlusher).
+        mail_executor.submit(message).result(timeout=send_timeout())
+
+
+admin_digest = AdminDigestNotifier(ADMIN_DIGEST_INTERVAL, ADMIN_DIGEST_BATCH_SIZE)
+
+
+def notify_new_subscriber(email, source, created):
+    admin_digest.add({
+        "kind": "subscriber",
+        "created_at": timezone.now(),
+        "email": email,
+        "source": source,
+        "created": created,
+    })
+
+
+def notify_consultation(name, email, phone, company, question):
+    # Immediate mode only wakes the digest thread early; the SMTP round trip
+    # still happens off the request path.
+    admin_digest.add({
+        "kind": "consultation",
+        "created_at": timezone.now(),
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "company": company,
+        "question": question,
+    }, flush_now=getattr(settings, "CONSULTATION_NOTIFY_IMMEDIATE", False))
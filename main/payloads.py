@@ -0,0 +1,81 @@
+import gzip
+import json
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available.
+    brotli = None
+
+
+COMPRESS_MIN_SIZE = 512
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+class EncodedPayload:
+    """A JSON response body rendered once, with precompressed variants.
+
+    The cache stores these instead of Python dicts, so a hit only has to pick
+    the variant that matches ``Accept-Encoding``.
+    """
+
+    __slots__ = ("identity", "gzip", "br")
+
+    def __init__(self, data):
+        self.identity = JSONRenderer().render(data)
+        self.gzip = None
+        self.br = None
+        if len(self.identity) >= COMPRESS_MIN_SIZE:
+            self.gzip = gzip.compress(self.identity, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.br = brotli.compress(self.identity, quality=BROTLI_QUALITY)
+
+    def __getstate__(self):
+        return self.identity, self.gzip, self.br
+
+    def __setstate__(self, state):
+        self.identity, self.gzip, self.br = state
+
+    def data(self):
+        return json.loads(self.identity)
+
+
+def accepted_encodings(request):
+    accepted = {}
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def encoded_response(request, payload, status=200):
+    accepted = accepted_encodings(request)
+    candidates = [
+        (accepted.get("br", accepted.get("*", 0.0)), "br", payload.br),
+        (accepted.get("gzip", accepted.get("*", 0.0)), "gzip", payload.gzip),
+    ]
+    body, encoding = payload.identity, None
+    best = 0.0
+    for quality, name, variant in candidates:
+        if variant is not None and quality > best:
+            body, encoding, best = variant, name, quality
+    response = HttpResponse(body, content_type="application/json", status=status)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if payload.gzip is not None:
+        patch_vary_headers(response, ("Accept-Encoding",))
+    return response
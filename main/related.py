@@ -0,0 +1,185 @@
+import re
+from collections import Counter
+
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+from .models import Article, ArticleIndex, ArticleTerm
+
+
+RELATED_LIMIT = 5
+TERMS_PER_ARTICLE = 40
+# ArticleTerm.term.max_length
+MAX_TERM_LENGTH = 100
+TERM_RE = re.compile(r"[^\W\d_]{3,}")
+STOPWORDS = frozenset("""
+    yang dan di ke dari untuk dengan pada ini itu dalam tidak akan juga atau ada
+    adalah oleh sebagai karena bisa lebih kita kami mereka anda saya sudah telah
+    agar jika namun serta bagi dapat hanya saat para antara setiap secara tersebut
+    the and for with that this from are was were have has had not but you your
+    our their they can will into about more than also its which when what how
+""".split())
+
+
+def extract_terms(article):
+    text = f"{article.title} {strip_tags(article.content or '')}".lower()
+    counts = Counter(term for term in TERM_RE.findall(text) if term not in STOPWORDS and len(term) <= MAX_TERM_LENGTH)
+    top = counts.most_common(TERMS_PER_ARTICLE)
+    if not top:
+        return {}
+    highest = top[0][1]
+    return {term: round(count / highest, 4) for term, count in top}
+
+
+def term_overlap(terms, other_terms):
+    if len(other_terms) < len(terms):
+        terms, other_terms = other_terms, terms
+    return round(sum(min(weight, other_terms[term]) for term, weight in terms.items() if term in other_terms), 4)
+
+
+def sharing_terms(terms, exclude=None):
+    """Pks of the articles with any of ``terms``; no other article can
+    score above zero against them."""
+    if not terms:
+        return set()
+    pks = set(ArticleTerm.objects.filter(term__in=list(terms)).values_list('article_id', flat=True))
+    pks.discard(exclude)
+    return pks
+
+
+def store_terms(article_pk, terms):
+    ArticleTerm.objects.filter(article_id=article_pk).exclude(term__in=list(terms)).delete()
+    ArticleTerm.objects.bulk_create([ArticleTerm(article_id=article_pk, term=term) for term in terms], ignore_conflicts=True)
+
+
+def _related_among_sharing(index, exclude=None, extra=()):
+    """Top related entries of ``index`` recomputed from the articles that
+    share one of its terms."""
+    pool = ArticleIndex.objects.filter(article_id__in=sharing_terms(index.terms, exclude=index.article_id))
+    if exclude is not None:
+        pool = pool.exclude(article_id=exclude)
+    return _top_related([(other.article_id, term_overlap(index.terms, other.terms)) for other in pool] + list(extra))
+
+
+def _top_related(scored):
+    ranked = sorted(((score, pk) for pk, score in scored if score > 0), key=lambda item: (-item[0], -item[1]))
+    return [[pk, score] for score, pk in ranked[:RELATED_LIMIT]]
+
+
+def _neighbours(article):
+    older = Q(published_at__lt=article.published_at) | Q(published_at=article.published_at, pk__lt=article.pk)
+    newer = Q(published_at__gt=article.published_at) | Q(published_at=article.published_at, pk__gt=article.pk)
+    previous_id = Article.objects.filter(older).order_by('-published_at', '-pk').values_list('pk', flat=True).first()
+    next_id = Article.objects.filter(newer).order_by('published_at', 'pk').values_list('pk', flat=True).first()
+    return previous_id, next_id
+
+
+def update_article_index(article):
+    """Refresh ``article``'s index row and patch the rows that link to it.
+
+    Returns the pks of the other articles whose previous/next/related links
+    changed (or point at ``article`` and so carry its title), so their
+    snapshots can be rewritten.
+    """
+    terms = extract_terms(article)
+    old = ArticleIndex.objects.filter(article=article).first()
+    # Only articles sharing a term with the new or the old terms can score
+    # above zero now or have listed this article before.
+    candidates = sharing_terms(terms.keys() | (old.terms.keys() if old else set()), exclude=article.pk)
+    others = {index.article_id: index for index in ArticleIndex.objects.filter(article_id__in=candidates)}
+    scores = {pk: term_overlap(terms, index.terms) for pk, index in others.items()}
+    previous_id, next_id = _neighbours(article)
+
+    ArticleIndex.objects.update_or_create(
+        article=article,
+        defaults={
+            'terms': terms,
+            'previous_article_id': previous_id,
+            'next_article_id': next_id,
+            'related': _top_related(scores.items()),
+        },
+    )
+    store_terms(article.pk, terms)
+
+    affected = set()
+    changed = []
+    for pk, index in others.items():
+        listed = [entry for entry in index.related if entry[0] != article.pk]
+        was_listed = len(listed) != len(index.related)
+        score = scores[pk]
+        if was_listed:
+            affected.add(pk)
+        # Entries rank by (score, pk), the same order _top_related() uses.
+        if not was_listed and (score <= 0 or (len(listed) >= RELATED_LIMIT and (score, article.pk) <= (listed[-1][1], listed[-1][0]))):
+            continue
+        if was_listed and len(index.related) >= RELATED_LIMIT and (score, article.pk) < (index.related[-1][1], index.related[-1][0]):
+            # The article dropped below the cut-off, so a candidate outside
+            # the stored list may now belong in it.
+            related = _related_among_sharing(index, exclude=article.pk, extra=[(article.pk, score)])
+        else:
+            related = _top_related([(entry[0], entry[1]) for entry in listed] + [(article.pk, score)])
+        if related != index.related:
+            index.related = related
+            changed.append(index)
+            affected.add(pk)
+    if changed:
+        ArticleIndex.objects.bulk_update(changed, ['related'])
+
+    # Old and new neighbours both need new links, and both show this
+    # article's title even when their own neighbours did not change.
+    neighbour_ids = {previous_id, next_id}
+    if old:
+        neighbour_ids |= {old.previous_article_id, old.next_article_id}
+    neighbour_ids.discard(None)
+    refresh_neighbours(neighbour_ids)
+    return affected | neighbour_ids
+
+
+def refresh_neighbours(pks):
+    for article in Article.objects.filter(pk__in=pks).only('pk', 'published_at'):
+        previous_id, next_id = _neighbours(article)
+        ArticleIndex.objects.filter(article=article).update(previous_article_id=previous_id, next_article_id=next_id)
+
+
+def linked_article_ids(article):
+    """Pks of the articles whose index links to ``article``."""
+    linked = set(
+        ArticleIndex.objects.filter(Q(previous_article=article) | Q(next_article=article)).values_list('article_id', flat=True)
+    )
+    terms = ArticleIndex.objects.filter(article=article).values_list('terms', flat=True).first() or {}
+    candidates = ArticleIndex.objects.filter(article_id__in=sharing_terms(terms, exclude=article.pk))
+    for pk, related in candidates.values_list('article_id', 'related'):
+        if any(entry[0] == article.pk for entry in related):
+            linked.add(pk)
+    return linked
+
+
+def remove_article_from_index(pks):
+    """Rebuild the rows in ``pks`` after the article they linked to was deleted."""
+    changed = []
+    for index in ArticleIndex.objects.filter(article_id__in=pks):
+        index.related = _related_among_sharing(index)
+        changed.append(index)
+    if changed:
+        ArticleIndex.objects.bulk_update(changed, ['related'])
+    refresh_neighbours(pks)
+
+
+def rebuild_article_index():
+    articles = list(Article.objects.only('pk', 'title', 'content', 'published_at'))
+    terms = {article.pk: extract_terms(article) for article in articles}
+    for article in articles:
+        previous_id, next_id = _neighbours(article)
+        ArticleIndex.objects.update_or_create(
+            article=article,
+            defaults={
+                'terms': terms[article.pk],
+                'previous_article_id': previous_id,
+                'next_article_id': next_id,
+                'related': _top_related(
+                    [(pk, term_overlap(terms[article.pk], other)) for pk, other in terms.items() if pk != article.pk]
+                ),
+            },
+        )
+        store_terms(article.pk, terms[article.pk])
+    return len(articles)
@@ -0,0 +1,193 @@
+"""The optimized article HTML served by the detail API.
+
+``optimize_article_html`` runs when an article is saved and its result is
+stored in ``Article.optimized_content``. The CKEditor markup is minified by
+``main.markup`` and every ``<img>`` gets ``loading="lazy"``,
+``decoding="async"`` and its intrinsic ``width``/``height``, so the page does
+not shift while images load. Images stored in our media also get a
+``srcset`` of resized derivatives, written once next to the original under
+content-hash names so ``main.media`` serves them as immutable. A small JSON
+manifest beside them records the original's size and dimensions, so later
+saves reuse the derivatives without opening the image.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .markup import rewrite_images
+from .media import hashed_name
+
+
+DERIVATIVES_DIRECTORY = "derivatives"
+PIXELS_RE = re.compile(r"^(\d+(?:\.\d+)?)(?:px)?$", re.I)
+EXIF_ORIENTATION = 0x0112
+# EXIF orientations that swap width and height once applied.
+TRANSPOSED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+
+
+def pixels(value):
+    match = PIXELS_RE.match((value or "").strip())
+    return (round(float(match.group(1))) or None) if match else None
+
+
+def media_name(src):
+    """Storage name of an image served from MEDIA_URL, or ``None``."""
+    parts = urlsplit(src)
+    if parts.netloc and parts.netloc != urlsplit(getattr(settings, "SITE_URL", "") or "").netloc:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith(settings.MEDIA_URL):
+        return None
+    return path[len(settings.MEDIA_URL):] or None
+
+
+def media_url(name, like):
+    # Derivatives are linked the way the editor linked the original.
+    url = default_storage.url(name)
+    parts = urlsplit(like)
+    if parts.netloc and url.startswith("/"):
+        return f"{parts.scheme}://{parts.netloc}{url}"
+    return url
+
+
+def manifest_name(name):
+    directory, filename = os.path.split(name)
+    return os.path.join(directory, DERIVATIVES_DIRECTORY, f"{filename}.json")
+
+
+def read_manifest(name, size, widths):
+    try:
+        with default_storage.open(manifest_name(name)) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError, SuspiciousOperation):
+        return None
+    # A different size means the original was replaced under the same name.
+    if manifest.get("size") != size or manifest.get("widths") != widths:
+        return None
+    return manifest["width"], manifest["height"], [tuple(derivative) for derivative in manifest["derivatives"]]
+
+
+def write_manifest(name, size, widths, sources):
+    width, height, derivatives = sources
+    manifest = manifest_name(name)
+    if default_storage.exists(manifest):
+        default_storage.delete(manifest)
+    content = json.dumps({"size": size, "widths": widths, "width": width, "height": height, "derivatives": derivatives})
+    default_storage.save(manifest, ContentFile(content.encode()))
+
+
+def responsive_sources(name):
+    """Return ``(width, height, [(name, width), ...])`` for the stored image
+    ``name``: its size as displayed and its resized derivatives, narrowest
+    first, created when missing. ``None`` when it cannot be read."""
+    try:
+        size = default_storage.size(name)
+    except (OSError, SuspiciousOperation):
+        return None
+    widths = sorted(set(getattr(settings, "ARTICLE_IMAGE_WIDTHS", (480, 960, 1440))))
+    sources = read_manifest(name, size, widths)
+    if sources is None:
+        sources = create_responsive_sources(name, widths)
+        if sources is not None:
+            write_manifest(name, size, widths, sources)
+    return sources
+
+
+def create_responsive_sources(name, widths):
+    from PIL import Image, ImageOps
+    from .uploads import encode_image, has_transparency
+
+    try:
+        with default_storage.open(name) as file:
+            original = file.read()
+        image = Image.open(io.BytesIO(original))
+        width, height = image.size
+        orientation = image.getexif().get(EXIF_ORIENTATION)
+    except (OSError, ValueError, SuspiciousOperation, Image.DecompressionBombError):
+        return None
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    if getattr(image, "is_animated", False):
+        return width, height, []
+
+    digest = hashlib.sha256(original).hexdigest()[:16]
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = ".png" if has_transparency(image) else ".jpg"
+    derivatives = []
+    upright = None
+    for target in widths:
+        if target >= width:
+            break
+        derivative = os.path.join(directory, DERIVATIVES_DIRECTORY, hashed_name(f"{stem}-{target}w", digest, extension))
+        if not default_storage.exists(derivative):
+            if upright is None:
+                upright = ImageOps.exif_transpose(image)
+            resized = upright.resize((target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+            derivative = default_storage.save(derivative, ContentFile(encode_image(resized)[0]))
+        derivatives.append((derivative, target))
+    return width, height, derivatives
+
+
+def optimize_article_html(html):
+    """Return the minified, lazily loaded and responsive rendition of the
+    article body ``html``."""
+    sources = {}
+
+    def rewrite_image(img):
+        # CKEditor sizes images with an inline style; as attributes they
+        # also reserve the space before the image loads.
+        for name in ("width", "height"):
+            if not img.get(name, "").strip():
+                img.pop(name, None)
+        declarations = []
+        for declaration in filter(None, img.pop("style", "").split(";")):
+            name, _, value = declaration.partition(":")
+            name = name.lower()
+            if name in ("width", "height") and pixels(value):
+                img[name] = str(pixels(value))
+            else:
+                declarations.append(declaration)
+        if declarations:
+            img["style"] = ";".join(declarations)
+        img.setdefault("loading", "lazy")
+        img.setdefault("decoding", "async")
+
+        src = img.get("src", "")
+        name = media_name(src) if src and not src.startswith("data:") else None
+        if name is None:
+            return
+        if name not in sources:
+            sources[name] = responsive_sources(name)
+        if sources[name] is None:
+            return
+        width, height, derivatives = sources[name]
+
+        shown_width, shown_height = pixels(img.get("width")), pixels(img.get("height"))
+        if shown_width and not shown_height and "height" not in img:
+            img["height"] = str(round(shown_width * height / width))
+        elif shown_height and not shown_width and "width" not in img:
+            shown_width = round(shown_height * width / height)
+            img["width"] = str(shown_width)
+        elif "width" not in img and "height" not in img:
+            shown_width = width
+            img["width"], img["height"] = str(width), str(height)
+
+        if derivatives:
+            candidates = [*((media_url(derivative, src), target) for derivative, target in derivatives), (src, width)]
+            img["srcset"] = ", ".join(f"{url} {target}w" for url, target in candidates)
+            if shown_width:
+                img["sizes"] = f"(max-width: {shown_width}px) 100vw, {shown_width}px"
+                img["src"] = next(url for url, target in candidates if target >= min(shown_width, width))
+            else:
+                img["sizes"] = "100vw"
+
+    return rewrite_images(html, rewrite_image, minify=True)
@@ -0,0 +1,144 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, connections
+
+
+REPLICA = "replica"
+PIN_COOKIE = "primary_pin"
+
+_routing = ContextVar("replica_routing", default=None)
+# When each model was last written by this process; reads of a model that
+# changed within REPLICA_PIN_SECONDS stay on the primary, so the article
+# caches that Article.save() just invalidated are not refilled from a
+# replica that has not caught up yet.
+_last_write = {}
+_health = {"healthy": True, "checked_at": 0.0}
+
+
+class RequestRouting:
+    __slots__ = ("pinned", "replica", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.replica = False
+        self.wrote = False
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_healthy():
+    """Whether the replica answered a ``SELECT 1`` at the last check, which
+    is repeated at most every REPLICA_HEALTH_INTERVAL seconds."""
+    now = time.monotonic()
+    if now - _health["checked_at"] >= getattr(settings, "REPLICA_HEALTH_INTERVAL", 10):
+        _health["checked_at"] = now
+        try:
+            with connections[REPLICA].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            _health["healthy"] = True
+        except DatabaseError as e:
+            print(f"Replica unavailable, reading from the primary: {e}")
+            mark_replica_unhealthy()
+    return _health["healthy"]
+
+
+def mark_replica_unhealthy():
+    _health["healthy"] = False
+    _health["checked_at"] = time.monotonic()
+    connections[REPLICA].close()
+
+
+def start_routing(pinned=False):
+    routing = RequestRouting(pinned=pinned)
+    return routing, _routing.set(routing)
+
+
+def end_routing(token):
+    _routing.reset(token)
+
+
+def current_routing():
+    return _routing.get()
+
+
+@contextmanager
+def unpinned_writes():
+    """Writes of derived data, such as a snapshot rebuilt while serving a
+    read, that do not pin the client to the primary."""
+    routing = _routing.get()
+    wrote = routing.wrote if routing is not None else False
+    try:
+        yield
+    finally:
+        if routing is not None:
+            routing.wrote = wrote
+
+
+class ReplicaRouter:
+    """Sends reads to the replica only inside views that opted in (see
+    ReplicaReadMixin); everything else, and every write, uses ``default``."""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.replica or routing.pinned or routing.wrote:
+            return None
+        written = _last_write.get(model._meta.label)
+        if written is not None and time.monotonic() - written < getattr(settings, "REPLICA_PIN_SECONDS", 5):
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        _last_write[model._meta.label] = time.monotonic()
+        routing = _routing.get()
+        if routing is not None:
+            # Later reads in this request, and this client's next requests
+            # (see ReplicaPinMiddleware), must see the write.
+            routing.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve the view's reads from the replica when one is configured and
+    healthy, retrying on the primary if the replica fails mid-request."""
+
+    replica_read_methods = ("GET", "HEAD")
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.replica_read_methods or not replica_configured():
+            return super().dispatch(request, *args, **kwargs)
+
+        token = None
+        if current_routing() is None:
+            # Called without ReplicaPinMiddleware, e.g. by the cache warm-up.
+            _, token = start_routing()
+        try:
+            routing = current_routing()
+            if routing.pinned or not replica_healthy():
+                return super().dispatch(request, *args, **kwargs)
+            routing.replica = True
+            try:
+                return super().dispatch(request, *args, **kwargs)
+            except (OperationalError, InterfaceError) as e:
+                print(f"Replica read failed, retrying on the primary: {e}")
+                mark_replica_unhealthy()
+                routing.replica = False
+                return super().dispatch(request, *args, **kwargs)
+            finally:
+                routing.replica = False
+        finally:
+            if token is not None:
+                end_routing(token)
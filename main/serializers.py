@@ -1,6 +1,9 @@
 from django.conf import settings
 from rest_framework import serializers
-from .models import Article
+from .models import Article, ArticleIndex
+
+
+ARTICLE_MODEL_FIELDS = {field.name for field in Article._meta.concrete_fields}
 
 def get_cover_image_url(obj, request=None):
     if not obj.cover_image:
@@ -13,7 +16,80 @@ def get_cover_image_url(obj, request=None):
     return obj.cover_image.url
 
 
-class ArticleListSerializer(serializers.ModelSerializer):
+def article_link(article):
+    return {'slug': article.slug, 'title': article.title, 'published_at': article.published_at.isoformat()}
+
+
+def get_article_links(obj):
+    """Previous, next and related article links from the article's index,
+    loaded with two queries and memoized on ``obj``."""
+    links = getattr(obj, '_article_links', None)
+    if links is not None:
+        return links
+    links = {'previous': None, 'next': None, 'related': []}
+    index = (
+        ArticleIndex.objects.filter(article_id=obj.pk)
+        .values_list('previous_article_id', 'next_article_id', 'related')
+        .first()
+    )
+    if index:
+        previous_id, next_id, related = index
+        related_ids = [entry[0] for entry in related]
+        articles = Article.objects.only('slug', 'title', 'published_at').in_bulk(
+            [pk for pk in (previous_id, next_id) if pk] + related_ids
+        )
+        if previous_id in articles:
+            links['previous'] = article_link(articles[previous_id])
+        if next_id in articles:
+            links['next'] = article_link(articles[next_id])
+        links['related'] = [article_link(articles[pk]) for pk in related_ids if pk in articles]
+    obj._article_links = links
+    return links
+
+
+def article_only_fields(fields):
+    only = {'id'} | (set(fields) & ARTICLE_MODEL_FIELDS)
+    if 'content' in only:
+        only.add('optimized_content')
+    return only
+
+
+def wants_raw_content(query_params):
+    """``?content=raw`` asks for the body as CKEditor saved it."""
+    return query_params.get('content') == 'raw'
+
+
+def parse_fieldset(query_params, serializer_class):
+    """Return the sorted field names selected by ``?fields=``/``?omit=``, or
+    ``None`` when the full representation is wanted.
+    """
+    available = serializer_class.Meta.fields
+    fields = query_params.get('fields')
+    omit = query_params.get('omit')
+    if not fields and not omit:
+        return None
+    selected = set(available)
+    if fields:
+        selected &= {name.strip() for name in fields.split(',')}
+    if omit:
+        selected -= {name.strip() for name in omit.split(',')}
+    if not selected:
+        raise serializers.ValidationError({'fields': f"Choose from: {', '.join(available)}"})
+    if selected == set(available):
+        return None
+    return tuple(sorted(selected))
+
+
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ArticleListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
 
     class Meta:
@@ -24,12 +100,31 @@ class ArticleListSerializer(serializers.ModelSerializer):
         return get_cover_image_url(obj, self.context.get('request'))
 
 
-class ArticleDetailSerializer(serializers.ModelSerializer):
+class ArticleDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     cover_image = serializers.SerializerMethodField()
+    content = serializers.SerializerMethodField()
+    previous = serializers.SerializerMethodField()
+    next = serializers.SerializerMethodField()
+    related = serializers.SerializerMethodField()
 
     class Meta:
         model = Article
-        fields = ['id', 'slug', 'title', 'author', 'published_at', 'cover_image', 'content', 'created_at', 'updated_at']
+        fields = ['id', 'slug', 'title', 'author', 'published_at', 'cover_image', 'content', 'created_at', 'updated_at', 'previous', 'next', 'related']
 
     def get_cover_image(self, obj):
         return get_cover_image_url(obj, self.context.get('request'))
+
+    def get_content(self, obj):
+        request = self.context.get('request')
+        if (request is not None and wants_raw_content(request.query_params)) or not obj.optimized_content:
+            return obj.content
+        return obj.optimized_content
+
+    def get_previous(self, obj):
+        return get_article_links(obj)['previous']
+
+    def get_next(self, obj):
+        return get_article_links(obj)['next']
+
+    def get_related(self, obj):
+        return get_article_links(obj)['related']
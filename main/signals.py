@@ -0,0 +1,89 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache_tags import ARTICLE_LIST_TAG, article_tag, invalidate_tags, newsletter_tag
+from .cdn import purge_tags
+from .feeds import regenerate_feed_documents
+from .models import Article, NewsletterCampaign, NewsletterContent, NewsletterWelcomeMessage, bulk_written
+from .related import linked_article_ids, remove_article_from_index, update_article_index
+from .snapshots import refresh_article_snapshots, write_article_snapshot
+
+
+NEWSLETTER_MODELS = (NewsletterWelcomeMessage, NewsletterCampaign)
+
+
+def invalidate_article_tags(*tags):
+    # Article responses are also cached at the edge; see main.cdn.
+    invalidate_tags(*tags)
+    purge_tags(*tags)
+
+
+def sync_articles(articles, stale_tags=()):
+    """Rebuild the index rows, snapshots and feeds derived from ``articles``,
+    then invalidate the cached entries that showed them."""
+    pks = {article.pk for article in articles}
+    linked = set()
+    for article in articles:
+        linked |= update_article_index(article)
+    tags = {ARTICLE_LIST_TAG, *stale_tags}
+    for article in articles:
+        write_article_snapshot(article)
+        tags.add(article_tag(article.slug))
+    tags.update(article_tag(slug) for slug in refresh_article_snapshots(linked - pks))
+    regenerate_feed_documents()
+    invalidate_article_tags(*tags)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, raw=False, **kwargs):
+    previous_slug = getattr(instance, "_previous_slug", None)
+    stale_tags = [article_tag(previous_slug)] if previous_slug else []
+    if raw:
+        # Fixture loading: derived rows are rebuilt by rebuild_article_snapshots.
+        invalidate_article_tags(ARTICLE_LIST_TAG, article_tag(instance.slug), *stale_tags)
+        return
+    sync_articles([instance], stale_tags)
+
+
+@receiver(pre_delete, sender=Article)
+def article_deleting(sender, instance, **kwargs):
+    instance._linked_article_ids = linked_article_ids(instance)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    # Also runs for each row of a queryset or admin bulk delete.
+    linked = getattr(instance, "_linked_article_ids", set())
+    remove_article_from_index(linked)
+    tags = {ARTICLE_LIST_TAG, article_tag(instance.slug)}
+    tags.update(article_tag(slug) for slug in refresh_article_snapshots(linked))
+    regenerate_feed_documents()
+    invalidate_article_tags(*tags)
+
+
+@receiver(bulk_written, sender=Article)
+def articles_bulk_written(sender, pks, stale_tags, **kwargs):
+    articles = list(Article.objects.filter(pk__in=pks))
+    for article in articles:
+        article.refresh_derived_fields()
+    sync_articles(articles, stale_tags)
+
+
+def newsletter_content_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not NewsletterContent.RENDERED_FIELDS & set(update_fields):
+        return
+    invalidate_tags(newsletter_tag(sender, instance.pk))
+
+
+def newsletter_content_deleted(sender, instance, **kwargs):
+    invalidate_tags(newsletter_tag(sender, instance.pk))
+
+
+def newsletter_content_bulk_written(sender, pks, stale_tags, **kwargs):
+    invalidate_tags(*stale_tags, *(newsletter_tag(sender, pk) for pk in pks))
+
+
+for model in NEWSLETTER_MODELS:
+    post_save.connect(newsletter_content_saved, sender=model)
+    post_delete.connect(newsletter_content_deleted, sender=model)
+    bulk_written.connect(newsletter_content_bulk_written, sender=model)
@@ -0,0 +1,68 @@
+from .feeds import build_feed_fragments
+from .models import Article, ArticleSnapshot
+from .serializers import ArticleDetailSerializer, ArticleListSerializer
+
+
+def build_article_snapshot(article):
+    # Serialized without a request: cover_image stays relative unless SITE_URL
+    # is set, and with_absolute_urls() completes it per request.
+    summary = dict(ArticleListSerializer(article).data)
+    detail = dict(ArticleDetailSerializer(article).data)
+    return summary, detail
+
+
+def write_article_snapshot(article):
+    summary, detail = build_article_snapshot(article)
+    ArticleSnapshot.objects.update_or_create(
+        article_id=article.pk,
+        defaults={
+            "slug": article.slug,
+            "published_at": article.published_at,
+            "summary": summary,
+            "detail": detail,
+            **build_feed_fragments(article),
+        },
+    )
+    return detail
+
+
+def refresh_article_snapshots(pks):
+    """Rewrite the snapshots of ``pks`` and return their slugs."""
+    slugs = []
+    for article in Article.objects.filter(pk__in=pks):
+        write_article_snapshot(article)
+        slugs.append(article.slug)
+    return slugs
+
+
+def rebuild_article_snapshots():
+    count = 0
+    for article in Article.objects.iterator():
+        write_article_snapshot(article)
+        count += 1
+    return count
+
+
+def write_missing_article_snapshots(slugs=None):
+    """Write the snapshots of the articles that have none, e.g. rows loaded
+    before the first rebuild; only those in ``slugs`` when given. Returns
+    the details written by slug."""
+    articles = Article.objects.filter(snapshot__isnull=True)
+    if slugs is not None:
+        articles = articles.filter(slug__in=slugs)
+    return {article.slug: write_article_snapshot(article) for article in articles}
+
+
+def get_detail_snapshot(slug):
+    return ArticleSnapshot.objects.filter(slug=slug).values_list("detail", flat=True).first()
+
+
+def summary_snapshots():
+    return ArticleSnapshot.objects.order_by("-published_at", "-article").values_list("summary", flat=True)
+
+
+def with_absolute_urls(payload, request):
+    cover_image = payload.get("cover_image")
+    if request is not None and cover_image and cover_image.startswith("/"):
+        payload = {**payload, "cover_image": request.build_absolute_uri(cover_image)}
+    return payload
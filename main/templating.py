@@ -0,0 +1,31 @@
+import re
+
+
+SLOT_DELIMITER = "\x1e"
+SLOT_RE = re.compile(f"{SLOT_DELIMITER}(\\w+){SLOT_DELIMITER}")
+
+
+def slot(name):
+    """Placeholder for ``name`` in text that will be compiled.
+
+    The record separator control character never occurs in editor or email
+    markup, so rendered content cannot be mistaken for a slot.
+    """
+    return f"{SLOT_DELIMITER}{name}{SLOT_DELIMITER}"
+
+
+class CompiledTemplate:
+    """Text split once around its slots, so filling it in per recipient is
+    a list assignment and a join."""
+
+    __slots__ = ("_parts", "_slots")
+
+    def __init__(self, text):
+        self._parts = SLOT_RE.split(text)
+        self._slots = [(index, self._parts[index]) for index in range(1, len(self._parts), 2)]
+
+    def render(self, values):
+        parts = self._parts[:]
+        for index, name in self._slots:
+            parts[index] = values[name]
+        return "".join(parts)
@@ -1,3 +1,1275 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import os
+import pickle
+import random
+import smtplib
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+import xml.etree.ElementTree as ElementTree
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import OperationalError, connections
+from django.core.mail import EmailMessage
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
+from django.utils.http import parse_http_date
+from PIL import Image
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import cdn, related, routers
+from .buffering import BufferedFlusher
+from .cache_tags import ARTICLE_LIST_TAG, article_tag, invalidate_tags, newsletter_tag, tagged_key
+from .feeds import regenerate_feed_documents
+from .management.commands.profile_imports import parse_importtime
+from .mail import MailExecutor, MailQueueFull
+from .markup import rewrite_images
+from .media import hashed_name, is_hashed_name, parse_range
+from .metrics import end_request, start_request, timed
+from .models import (
+    Article,
+    ArticleIndex,
+    ArticleSnapshot,
+    FeedDocument,
+    NewsletterCampaign,
+    NewsletterCampaignStat,
+    NewsletterSubscriber,
+    NewsletterWelcomeMessage,
+    iter_subscriber_emails,
+    unsubscribe_url,
+)
+from .notifications import AdminDigestNotifier
+from .payloads import EncodedPayload, accepted_encodings, encoded_response
+from .related import rebuild_article_index
+from .rendition import optimize_article_html
+from .routers import (
+    PIN_COOKIE,
+    REPLICA,
+    ReplicaReadMixin,
+    ReplicaRouter,
+    current_routing,
+    end_routing,
+    start_routing,
+    unpinned_writes,
+)
+from .serializers import ArticleDetailSerializer, ArticleListSerializer, parse_fieldset
+from .templating import CompiledTemplate, slot
+from .tracking import EngagementRecorder, click_url, open_pixel_url
+from .uploads import OptimizingImageBackend
+from .warmup import _warm_article_detail, warm_caches, warmup_request_factory, warmup_tasks
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+SITE_URL = "https://api.corvidian.io"
+IMAGE_STYLE = 'display:block;max-width:100%;width:auto;height:auto;border:0;outline:none;text-decoration:none;margin:10px 0;'
+
+
+class ApiTestCase(TestCase):
+    """Reads stay on ``default`` even with DATABASE_REPLICA_URL set; the
+    replica only sees committed rows, see ReplicaDatabaseTests."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(unittest.mock.patch("main.routers.replica_configured", return_value=False))
+
+
+def use_mail_executor(test, target, **kwargs):
+    """Patch ``target`` with a new MailExecutor for the test; the shared one
+    keeps connections of the backend an earlier test configured."""
+    options = {"workers": 1, "queue_size": 10, "queue_timeout": 0.1, "idle_timeout": 60, "shutdown_timeout": 5, **kwargs}
+    executor = MailExecutor(**options)
+    test.addCleanup(executor.shutdown)
+    patcher = unittest.mock.patch(target, executor)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return executor
+
+
+def create_article(title="Edisi Pertama", published_at=datetime.date(2024, 1, 1), content="<p>Isi</p>", **kwargs):
+    return Article.objects.create(title=title, author="Tim", published_at=published_at, content=content, **kwargs)
+
+
+def rewrite_image(img):
+    # The remote-site branch of NewsletterContent._render_html_body.
+    src = img.get('src', '')
+    if not src or src.startswith('data:'):
+        return
+    if not src.startswith('http'):
+        img['src'] = f"{SITE_URL}/{src.lstrip('/')}"
+    img['style'] = IMAGE_STYLE
+    if img.get('width'):
+        del img['width']
+    if img.get('height'):
+        del img['height']
+
+
+def rewrite_with_beautifulsoup(html):
+    """How newsletter bodies were rewritten before main.markup."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for img in soup.find_all('img'):
+        rewrite_image(img)
+    return str(soup)
+
+
+EDITOR_BODIES = [
+    '<p>Halo <strong>semua</strong>,</p>\n\n<p><img alt="" src="/media/newsletter/uploads/2024/11/01/a.png" style="height:400px; width:600px" /></p>\n',
+    '<h2>Judul</h2><p>Teks &amp; simbol &lt;tag&gt; &nbsp;dan&nbsp;spasi &copy; 2024 &#8211; &#x2014; &euro;</p>',
+    '<p><a href="https://www.corvidian.io/?a=1&amp;b=2" rel=" noopener  noreferrer " target="_blank">tautan</a></p>',
+    '<ul>\n\t<li>satu</li>\n\t<li>dua<li>tiga</ul>',
+    '<table border="1" cellpadding="1" class="  tabel   data "><tbody><tr><td headers=" a  b ">x</td></tr></tbody></table>',
+    '<p><img src="data:image/png;base64,AAAA" width="10"><img src="http://cdn.example.com/x.jpg" width="300" height="" alt="say &quot;hi&quot; it\'s"></p>',
+    '<IMG SRC=relative/path.jpg WIDTH=5 HEIGHT=6 class=foto><br><br/></br><hr>',
+    '<!DOCTYPE html><!-- komentar --><!----><!--   --><p>AT&T &foo; &#0; &#150; &#xD800;</p><![CDATA[x<y]]><?php echo 1 ?>',
+    '<script>if (a < b && c) { x = "<p>"; }</script><style>p > a { color: red; }</style>',
+    '<pre>  baris\n    indentasi  </pre><textarea> </textarea><p>  \n  </p><p> </p>',
+    '<div><p>tidak ditutup<b>tebal<i>miring</p></div></span><p/>',
+    '<meta charset="latin-1"><meta http-equiv="Content-Type" content="text/html; charset=ISO-8859-1">',
+    '<input disabled><div a=1 a=2 data-x="&lt;&gt;&amp;">x</div><img>',
+    '<p>é ü ✓ — “kutipan”</p>',
+    '',
+]
+
+FRAGMENTS = [
+    '<p>', '</p>', '<P class=" a  b ">', '<div id=x>', '</div>', '<br>', '<br/>', '</br>', '</img>', '<hr>',
+    '<img src="/media/a.png" width="10" height="" alt="a&amp;b">', '<IMG SRC=x.jpg WIDTH=5>', '<img>',
+    '<img src="data:image/png;base64,xx">', '<img src="http://q?a=1&b=2" style="x">', "<img alt='\"hi\"' src=y>",
+    'text', ' ', '\n', '  \n\t', '&amp;', '&lt;', '&nbsp;', '&copy', '&foo;', '&#169;', '&#x41;', '&#150;', '&#0;',
+    'AT&T', '<', '>', 'a < b', '<!-- c -->', '<!---->', '<!DOCTYPE html>', '<![CDATA[x<y]]>', '<?pi ?>', '<!ELEMENT x>',
+    '<script>if (a<b) {}</script>', '<style>p>a{}</style>', '<pre>  \n  </pre>', '<pre>', '</pre>', '<textarea> </textarea>',
+    '<span>', '</span>', '<b>', '</b>', '<a href="/x" rel=" nofollow  noopener ">', '</a>', '<td headers="a b">',
+    '<meta charset="latin-1">', '<p/>', '<div a=1 a=2>', '<input disabled>', 'é ✓', '<template><p>x</template>',
+]
+
+
+@unittest.skipIf(BeautifulSoup is None, "beautifulsoup4 is not installed")
+class RewriteImagesTests(SimpleTestCase):
+    def test_matches_beautifulsoup_on_editor_bodies(self):
+        for html in EDITOR_BODIES:
+            with self.subTest(html=html):
+                self.assertEqual(rewrite_images(html, rewrite_image), rewrite_with_beautifulsoup(html))
+
+    def test_matches_beautifulsoup_on_random_markup(self):
+        rng = random.Random(43)
+        for _ in range(3000):
+            html = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 12)))
+            with self.subTest(html=html):
+                self.assertEqual(rewrite_images(html, rewrite_image), rewrite_with_beautifulsoup(html))
+
+    def test_rewrites_image_attributes(self):
+        html = rewrite_images('<p><img src="/media/a.jpg" width="600" height="400" alt="A"></p>', rewrite_image)
+        self.assertEqual(
+            html,
+            f'<p><img alt="A" src="{SITE_URL}/media/a.jpg" style="{IMAGE_STYLE}"/></p>',
+        )
+
+
+class OptimizeArticleHtmlTests(SimpleTestCase):
+    def test_minifies_and_sizes_images(self):
+        html = optimize_article_html(
+            '<p>Halo   <b>dunia</b></p>\n\n<!-- catatan -->\n'
+            '<p><img alt="" src="https://cdn.example.com/a.jpg" style="height:300px; width:400px; border: 0" /></p>'
+            '<pre>  a\n  b</pre>'
+        )
+        self.assertEqual(
+            html,
+            '<p>Halo <b>dunia</b></p> <p><img alt="" decoding="async" height="300" loading="lazy" '
+            'src="https://cdn.example.com/a.jpg" style="border:0" width="400"/></p><pre>  a\n  b</pre>',
+        )
+
+
+class ResponsiveImageTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name, ARTICLE_IMAGE_WIDTHS=[480, 960, 1440]))
+        self.media_root = media_root.name
+        os.makedirs(os.path.join(self.media_root, "wawasan"))
+        output = io.BytesIO()
+        Image.new("RGB", (1200, 800), "teal").save(output, format="JPEG")
+        with open(os.path.join(self.media_root, "wawasan", "foto.jpg"), "wb") as file:
+            file.write(output.getvalue())
+
+    def test_adds_srcset_of_derivatives(self):
+        html = optimize_article_html('<p><img src="/media/wawasan/foto.jpg" style="width:600px"></p>')
+        derivatives = sorted(os.listdir(os.path.join(self.media_root, "wawasan", "derivatives")))
+        self.assertEqual(len(derivatives), 3)
+        self.assertEqual(derivatives[-1], "foto.jpg.json")
+        small, medium = (f"/media/wawasan/derivatives/{name}" for name in derivatives[:2])
+        self.assertRegex(small, r"/foto-480w\.hash-[0-9a-f]{16}\.jpg$")
+        with Image.open(os.path.join(self.media_root, small.removeprefix("/media/"))) as image:
+            self.assertEqual(image.size, (480, 320))
+        self.assertIn(f'srcset="{small} 480w, {medium} 960w, /media/wawasan/foto.jpg 1200w"', html)
+        self.assertIn('sizes="(max-width: 600px) 100vw, 600px"', html)
+        self.assertIn(f'src="{medium}"', html)
+        self.assertIn('height="400"', html)
+
+    def test_later_saves_do_not_open_the_image(self):
+        html = optimize_article_html('<img src="/media/wawasan/foto.jpg">')
+        with unittest.mock.patch("PIL.Image.open") as open_image:
+            self.assertEqual(optimize_article_html('<img src="/media/wawasan/foto.jpg">'), html)
+        open_image.assert_not_called()
+
+    def test_replaced_images_are_read_again(self):
+        optimize_article_html('<img src="/media/wawasan/foto.jpg">')
+        output = io.BytesIO()
+        Image.new("RGB", (600, 300), "navy").save(output, format="JPEG")
+        with open(os.path.join(self.media_root, "wawasan", "foto.jpg"), "wb") as file:
+            file.write(output.getvalue())
+        html = optimize_article_html('<img src="/media/wawasan/foto.jpg">')
+        self.assertIn('width="600"', html)
+        self.assertIn("480w", html)
+        self.assertNotIn("960w", html)
+
+
+class EncodedPayloadTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.payload = EncodedPayload({"results": [{"title": f"Edisi {i}"} for i in range(100)]})
+
+    def response(self, accept_encoding):
+        return encoded_response(self.factory.get("/", HTTP_ACCEPT_ENCODING=accept_encoding), self.payload)
+
+    def test_parses_quality_values(self):
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip;q=0.5, BR, identity;q=x, ,*;q=0")
+        self.assertEqual(accepted_encodings(request), {"gzip": 0.5, "br": 1.0, "identity": 0.0, "*": 0.0})
+
+    def test_serves_the_preferred_variant(self):
+        response = self.response("gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload.data())
+        self.assertEqual(self.response("gzip;q=0.4, br;q=0.8")["Content-Encoding"], "br")
+        self.assertEqual(self.response("br;q=0, *")["Content-Encoding"], "gzip")
+        self.assertFalse(self.response("gzip;q=0").has_header("Content-Encoding"))
+
+    def test_small_bodies_are_not_compressed(self):
+        payload = EncodedPayload({"title": "Edisi"})
+        response = encoded_response(self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip, br"), payload)
+        self.assertEqual(response.content, b'{"title":"Edisi"}')
+        self.assertFalse(response.has_header("Vary"))
+
+    def test_survives_the_cache(self):
+        payload = pickle.loads(pickle.dumps(self.payload))
+        self.assertEqual((payload.identity, payload.gzip, payload.br), (self.payload.identity, self.payload.gzip, self.payload.br))
+
+
+@unittest.skipIf(BeautifulSoup is None, "beautifulsoup4 is not installed")
+@override_settings(SITE_URL=SITE_URL)
+class NewsletterHtmlBodyTests(TestCase):
+    def test_body_markup_unchanged(self):
+        for html in EDITOR_BODIES:
+            with self.subTest(html=html):
+                campaign = NewsletterCampaign(subject="Edisi", body=html)
+                expected = rewrite_with_beautifulsoup(html) if html else ""
+                self.assertIn(f'line-height:1.6;">{expected}</td>', campaign._render_html_body())
+
+
+class PurgeRecorder(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append((dict(self.headers), json.loads(body)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CDN_PURGE_BACKEND="main.cdn.LocMemPurgeBackend", CDN_S_MAXAGE=86400)
+class EdgeCacheTests(ApiTestCase):
+    def setUp(self):
+        cdn.purged.clear()
+
+    def create_article(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_article()
+
+    def test_article_responses_carry_surrogate_keys(self):
+        self.create_article()
+        response = self.client.get("/api/wawasan/slug/edisi-pertama/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("s-maxage=86400", response["Cache-Control"])
+        self.assertIn("stale-while-revalidate=", response["Cache-Control"])
+        self.assertEqual(response["Surrogate-Key"], "article:edisi-pertama")
+        self.assertEqual(response["Cache-Tag"], "article:edisi-pertama")
+        self.assertEqual(self.client.get("/api/wawasan/")["Surrogate-Key"], "articles:list")
+        batch = self.client.get("/api/wawasan/batch/?slugs=edisi-pertama,edisi-kedua")
+        self.assertEqual(batch["Surrogate-Key"], "article:edisi-pertama article:edisi-kedua")
+        self.assertFalse(self.client.get("/api/wawasan/slug/tidak-ada/").has_header("Surrogate-Key"))
+
+    def test_writes_purge_after_commit(self):
+        article = self.create_article()
+        self.assertEqual(cdn.purged, [["article:edisi-pertama", "articles:list"]])
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.filter(pk=article.pk).update(slug="edisi-baru")
+        self.assertEqual(cdn.purged[-1], ["article:edisi-baru", "article:edisi-pertama", "articles:list"])
+
+    def test_cached_payloads_vary_on_accept(self):
+        self.create_article()
+        for path in ("/api/wawasan/", "/api/wawasan/slug/edisi-pertama/"):
+            for _ in range(2):
+                json_response = self.client.get(path, HTTP_ACCEPT="application/json")
+                html_response = self.client.get(path, HTTP_ACCEPT="text/html")
+                self.assertEqual(json_response["Content-Type"], "application/json")
+                self.assertTrue(html_response["Content-Type"].startswith("text/html"))
+                for response in (json_response, html_response):
+                    self.assertIn("Accept", [header.strip() for header in response["Vary"].split(",")])
+
+    def test_responses_setting_cookies_stay_private(self):
+        self.create_article()
+        # The browsable API renders a CSRF token, so CsrfViewMiddleware sets a cookie.
+        response = self.client.get("/api/wawasan/slug/edisi-pertama/", HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cookies)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertFalse(response.has_header("Surrogate-Key"))
+        self.assertFalse(response.has_header("Cache-Tag"))
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_purges_again_after_the_replica_lag(self):
+        with unittest.mock.patch("main.cdn.replica_configured", return_value=True):
+            self.create_article()
+        deadline = time.monotonic() + 5
+        while len(cdn.purged) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cdn.purged, [["article:edisi-pertama", "articles:list"]] * 2)
+
+    def test_http_backend_posts_tags(self):
+        server = HTTPServer(("127.0.0.1", 0), PurgeRecorder)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        PurgeRecorder.requests.clear()
+        url = f"http://127.0.0.1:{server.server_port}/purge"
+        with override_settings(CDN_PURGE_URL=url, CDN_PURGE_TOKEN="rahasia"):
+            cdn.HttpPurgeBackend().purge(["article:a", "articles:list"])
+        headers, body = PurgeRecorder.requests[0]
+        self.assertEqual(body, {"tags": ["article:a", "articles:list"]})
+        self.assertEqual(headers["Surrogate-Key"], "article:a articles:list")
+        self.assertEqual(headers["Authorization"], "Bearer rahasia")
+
+
+class DroppingBackend(EmailBackend):
+    """locmem backend whose connection drops on the first send."""
+
+    created = 0
+    dropped = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        DroppingBackend.created += 1
+
+    def send_messages(self, messages):
+        if not DroppingBackend.dropped:
+            DroppingBackend.dropped = True
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+class SmtpRecorder(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib; counts connections and messages."""
+
+    connections = 0
+    messages = 0
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        SmtpRecorder.connections += 1
+        self.reply("220 localhost")
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for data in self.rfile:
+                    if data.rstrip(b"\r\n") == b".":
+                        break
+                SmtpRecorder.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("250 OK")
+
+
+@override_settings(EMAIL_BACKEND="main.tests.DroppingBackend")
+class MailExecutorTests(SimpleTestCase):
+    def setUp(self):
+        mail.outbox = []
+        DroppingBackend.created, DroppingBackend.dropped = 0, False
+
+    def executor(self, queue_size=10):
+        executor = MailExecutor(1, queue_size, queue_timeout=0.1, idle_timeout=60, shutdown_timeout=5)
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def message(self, number):
+        return EmailMessage(f"Pesan {number}", "Isi", "noreply@corvidian.io", [f"user{number}@example.com"])
+
+    def test_reuses_connection_and_resends_after_disconnect(self):
+        executor = self.executor()
+        futures = [executor.submit(self.message(number)) for number in range(3)]
+        self.assertEqual([future.result(5) for future in futures], [1, 1, 1])
+        self.assertEqual([message.subject for message in mail.outbox], ["Pesan 0", "Pesan 1", "Pesan 2"])
+        self.assertTrue(DroppingBackend.dropped)
+        self.assertEqual(DroppingBackend.created, 1)
+
+    def test_keeps_the_smtp_connection_open(self):
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SmtpRecorder)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        SmtpRecorder.connections = SmtpRecorder.messages = 0
+        smtp = {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": server.server_address[1],
+            "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+        with override_settings(**smtp):
+            executor = self.executor()
+            futures = [executor.submit(self.message(number)) for number in range(5)]
+            self.assertEqual([future.result(5) for future in futures], [1] * 5)
+            executor.shutdown()
+        self.assertEqual(SmtpRecorder.messages, 5)
+        self.assertEqual(SmtpRecorder.connections, 1)
+
+    def test_full_queue_pushes_back(self):
+        executor = self.executor(queue_size=1)
+        release = threading.Event()
+        with unittest.mock.patch.object(DroppingBackend, "send_messages", lambda backend, messages: release.wait(5)):
+            executor.submit(self.message(0))
+            for number in range(1, 3):
+                try:
+                    executor.submit(self.message(number))
+                except MailQueueFull:
+                    break
+            else:
+                self.fail("submit never pushed back")
+            release.set()
+
+    def test_shutdown_does_not_hang_on_a_full_queue(self):
+        executor = MailExecutor(1, 1, queue_timeout=0.1, idle_timeout=60, shutdown_timeout=0.1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with unittest.mock.patch.object(DroppingBackend, "send_messages", lambda backend, messages: release.wait(5)):
+            executor.submit(self.message(0))
+            deadline = time.monotonic() + 5
+            while executor._queue.qsize() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            executor.submit(self.message(1))
+            started = time.monotonic()
+            executor.shutdown()
+            self.assertLess(time.monotonic() - started, 2)
+
+    def test_shutdown_sends_queued_messages(self):
+        executor = self.executor()
+        futures = [executor.submit(self.message(number)) for number in range(5)]
+        executor.shutdown()
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertEqual(len(mail.outbox), 5)
+        executor.submit(self.message(5)).result(5)
+        self.assertEqual(len(mail.outbox), 6)
+
+
+
+class StalledBackend(EmailBackend):
+    """Holds every send until ``release`` is set."""
+
+    release = threading.Event()
+
+    def send_messages(self, messages):
+        self.release.wait(5)
+        return len(messages)
+
+
+@override_settings(EMAIL_BACKEND="main.tests.StalledBackend", MAIL_QUEUE_TIMEOUT=0.1, EMAIL_TIMEOUT=0.1)
+class AdminTestEmailTests(TestCase):
+    def test_stalled_smtp_does_not_hang_the_admin(self):
+        use_mail_executor(self, "main.admin.mail_executor")
+        StalledBackend.release.clear()
+        self.addCleanup(StalledBackend.release.set)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        message = NewsletterWelcomeMessage.objects.create(subject="Selamat datang", body="<p>Halo</p>")
+        response = self.client.post(
+            "/admin/main/newsletterwelcomemessage/",
+            {"action": "send_test_email", "_selected_action": [message.pk]},
+            follow=True,
+        )
+        self.assertEqual(
+            [str(m) for m in response.context["messages"]],
+            ["Still sending 'Selamat datang'; it may arrive later."],
+        )
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers._last_write.clear()
+        self.router = ReplicaRouter()
+        self.routing, token = start_routing()
+        self.addCleanup(end_routing, token)
+
+    def test_reads_use_the_replica_only_inside_opted_in_views(self):
+        self.assertIsNone(self.router.db_for_read(Article))
+        self.routing.replica = True
+        self.assertEqual(self.router.db_for_read(Article), REPLICA)
+        self.routing.pinned = True
+        self.assertIsNone(self.router.db_for_read(Article))
+
+    def test_writes_keep_reads_on_the_primary(self):
+        self.routing.replica = True
+        self.assertIsNone(self.router.db_for_write(Article))
+        self.assertTrue(self.routing.wrote)
+        self.assertIsNone(self.router.db_for_read(NewsletterSubscriber))
+
+    def test_recently_written_models_wait_out_the_replica_lag(self):
+        self.router.db_for_write(Article)
+        self.routing.wrote = False
+        self.routing.replica = True
+        self.assertIsNone(self.router.db_for_read(Article))
+        self.assertEqual(self.router.db_for_read(NewsletterSubscriber), REPLICA)
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.assertEqual(self.router.db_for_read(Article), REPLICA)
+
+    def test_derived_writes_do_not_pin(self):
+        with unpinned_writes():
+            self.router.db_for_write(ArticleSnapshot)
+        self.assertFalse(self.routing.wrote)
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate(REPLICA, "main"))
+        self.assertIsNone(self.router.allow_migrate("default", "main"))
+
+
+class FlakyReplicaView(ReplicaReadMixin, APIView):
+    def get(self, request):
+        if current_routing().replica:
+            raise OperationalError("replica went away")
+        return Response({"ok": True})
+
+
+@unittest.mock.patch("main.middleware.replica_configured", return_value=True)
+@unittest.mock.patch("main.routers.replica_configured", return_value=True)
+class ReplicaPinTests(ApiTestCase):
+    def test_safe_requests_never_pin(self, *mocks):
+        with unittest.mock.patch("main.routers.replica_healthy", return_value=False):
+            create_article()
+            ArticleSnapshot.objects.all().delete()
+            response = self.client.get("/api/wawasan/slug/edisi-pertama/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(ArticleSnapshot.objects.exists())
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_writes_pin_the_client_to_the_primary(self, *mocks):
+        response = self.client.post("/api/subscribe/", {"email": "a@example.com"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_failed_replica_read_is_retried_on_the_primary(self, *mocks):
+        with unittest.mock.patch("main.routers.replica_healthy", return_value=True), \
+                unittest.mock.patch("main.routers.mark_replica_unhealthy") as mark_unhealthy:
+            response = FlakyReplicaView.as_view()(RequestFactory().get("/"))
+        self.assertEqual(response.data, {"ok": True})
+        mark_unhealthy.assert_called_once()
+
+
+@unittest.skipUnless(routers.replica_configured(), "set DATABASE_REPLICA_URL to a second database")
+@override_settings(REPLICA_PIN_SECONDS=0)
+class ReplicaDatabaseTests(TransactionTestCase):
+    # Committed rows, so the replica connection can read them. The runner
+    # checks every alias listed, so the replica is only listed when set.
+    databases = {"default", REPLICA} if routers.replica_configured() else {"default"}
+
+    def test_article_reads_go_to_the_replica(self):
+        create_article()
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            response = self.client.get("/api/wawasan/slug/edisi-pertama/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class FlakyFlusher(BufferedFlusher):
+    def __init__(self, failures, **kwargs):
+        super().__init__(interval=3600, batch_size=100, **kwargs)
+        self.failures = failures
+        self.flushed = []
+
+    def flush_items(self, items):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("SMTP unavailable")
+        self.flushed.append(items)
+
+
+class BufferedFlusherTests(SimpleTestCase):
+    def test_failed_batches_are_retried_with_new_items(self):
+        flusher = FlakyFlusher(failures=2)
+        flusher.add("a")
+        flusher.flush()
+        flusher.add("b")
+        flusher.flush()
+        flusher.add("c")
+        flusher.flush()
+        self.assertEqual(flusher.flushed, [["a", "b", "c"]])
+
+    def test_items_are_dropped_after_max_attempts(self):
+        flusher = FlakyFlusher(failures=3, max_attempts=3)
+        flusher.add("a")
+        for _ in range(3):
+            flusher.flush()
+        flusher.add("b")
+        flusher.flush()
+        self.assertEqual(flusher.flushed, [["b"]])
+
+
+@override_settings(CONSULTATION_RECEIVER_EMAIL="admin@corvidian.io", EMAIL_BACKEND="main.tests.DroppingBackend")
+class AdminDigestTests(SimpleTestCase):
+    def setUp(self):
+        mail.outbox = []
+        DroppingBackend.dropped = False
+        use_mail_executor(self, "main.notifications.mail_executor")
+
+    def event(self, email):
+        return {"kind": "subscriber", "created_at": datetime.datetime(2024, 1, 1), "email": email, "source": "footer", "created": True}
+
+    def test_one_consultation_gets_its_own_subject(self):
+        digest = AdminDigestNotifier(3600, 50)
+        digest.add({
+            "kind": "consultation", "created_at": datetime.datetime(2024, 1, 1), "name": "Budi",
+            "email": "budi@example.com", "phone": "0812", "company": "PT Contoh", "question": "Bisa bantu?",
+        })
+        DroppingBackend.dropped = True
+        digest.flush()
+        self.assertEqual(mail.outbox[0].subject, "Konsultasi Baru dari Budi")
+        self.assertIn("Pertanyaan:\nBisa bantu?", mail.outbox[0].body)
+
+    def test_failed_send_keeps_the_events(self):
+        digest = AdminDigestNotifier(3600, 50)
+        digest.add(self.event("a@example.com"))
+        with unittest.mock.patch.object(DroppingBackend, "send_messages", side_effect=smtplib.SMTPAuthenticationError(535, b"no")):
+            digest.flush()
+        self.assertEqual(mail.outbox, [])
+        digest.add(self.event("b@example.com"))
+        digest.flush()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("a@example.com", mail.outbox[0].body)
+        self.assertIn("b@example.com", mail.outbox[0].body)
+        self.assertIn("2 subscriber baru", mail.outbox[0].subject)
+
+
+class EngagementTrackingTests(ApiTestCase):
+    def setUp(self):
+        self.campaign = NewsletterCampaign.objects.create(subject="Kabar Bulanan")
+        self.recorder = EngagementRecorder(3600, 1000)
+        patcher = unittest.mock.patch("main.tracking.engagement", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def counts(self):
+        return {(stat.event, stat.url): stat.count for stat in NewsletterCampaignStat.objects.filter(campaign=self.campaign)}
+
+    def test_opens_and_clicks_are_counted(self):
+        url = "https://corvidian.io/wawasan/edisi-pertama/?utm=" + "x" * 3000
+        pixel = open_pixel_url(self.campaign.pk, "")
+        for _ in range(2):
+            response = self.client.get(pixel)
+            self.assertEqual(response["Content-Type"], "image/gif")
+        response = self.client.get(click_url(self.campaign.pk, url, ""))
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.recorder.flush()
+        self.client.get(pixel)
+        self.recorder.flush()
+        self.assertEqual(self.counts(), {(NewsletterCampaignStat.EVENT_OPEN, ""): 3, (NewsletterCampaignStat.EVENT_CLICK, url): 1})
+
+    def test_forged_tokens_are_not_counted(self):
+        self.assertEqual(self.client.get("/api/newsletter/o/palsu.gif").status_code, 200)
+        self.assertEqual(self.client.get("/api/newsletter/c/palsu/").status_code, 404)
+        self.recorder.flush()
+        self.assertEqual(self.counts(), {})
+
+    def test_failed_flush_keeps_the_counts(self):
+        self.client.get(open_pixel_url(self.campaign.pk, ""))
+        with unittest.mock.patch.object(NewsletterCampaignStat.objects, "filter", side_effect=OperationalError("database is locked")):
+            self.recorder.flush()
+        self.client.get(open_pixel_url(self.campaign.pk, ""))
+        self.recorder.flush()
+        self.assertEqual(self.counts(), {(NewsletterCampaignStat.EVENT_OPEN, ""): 2})
+
+    def test_deleted_campaign_does_not_fail_the_flush(self):
+        gone = NewsletterCampaign.objects.create(subject="Kabar Lama")
+        self.client.get(open_pixel_url(gone.pk, ""))
+        self.client.get(open_pixel_url(self.campaign.pk, ""))
+        gone.delete()
+        self.recorder.flush()
+        self.assertEqual(self.counts(), {(NewsletterCampaignStat.EVENT_OPEN, ""): 1})
+        self.assertFalse(NewsletterCampaignStat.objects.filter(campaign_id=gone.pk).exists())
+
+
+@override_settings(SITE_URL=SITE_URL, ALLOWED_HOSTS=["api.corvidian.io"])
+class WarmupTests(ApiTestCase):
+    def test_requests_look_like_public_traffic(self):
+        request = warmup_request_factory().get("/api/wawasan/?page=2")
+        self.assertEqual(request.build_absolute_uri(), f"{SITE_URL}/api/wawasan/?page=2")
+        self.assertEqual(request.GET["page"], "2")
+
+    def test_warmed_details_are_served_from_the_cache(self):
+        create_article()
+        _warm_article_detail(warmup_request_factory(), "edisi-pertama")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/wawasan/slug/edisi-pertama/", HTTP_HOST="api.corvidian.io", secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+    def test_warmed_campaigns_are_sent_without_rendering(self):
+        NewsletterSubscriber.objects.create(email="budi@example.com")
+        campaign = NewsletterCampaign.objects.create(subject="Kabar Hangat", body="<p>Halo</p>")
+        for label, func, args in warmup_tasks(warmup_request_factory(), pages=0, details=0):
+            func(*args)
+        with unittest.mock.patch.object(NewsletterCampaign, "_render_html_body", side_effect=AssertionError("rendered")):
+            self.assertEqual(campaign.send_to_subscribers(), 1)
+
+    def test_workers_start_at_random_points(self):
+        with unittest.mock.patch("main.warmup.warmup_tasks", return_value=[]), \
+                unittest.mock.patch("main.warmup.time.sleep") as sleep, \
+                unittest.mock.patch("main.warmup.random.uniform", return_value=1.5) as uniform:
+            warm_caches(jitter=4)
+        uniform.assert_called_once_with(0, 4)
+        sleep.assert_called_once_with(1.5)
+
+
+WORDS = "kopi teh gula susu roti keju madu jahe kayu manis cabai bawang garam merica".split()
+
+
+class ArticleIndexTests(ApiTestCase):
+    def stored_index(self):
+        return {
+            index.article_id: (index.previous_article_id, index.next_article_id, index.related)
+            for index in ArticleIndex.objects.all()
+        }
+
+    def test_incremental_updates_match_a_rebuild(self):
+        rng = random.Random(34)
+        articles = []
+        for number in range(12):
+            content = " ".join(rng.sample(WORDS, 4))
+            articles.append(create_article(
+                title=WORDS[number].title(), published_at=datetime.date(2024, 1, 1 + number % 5), content=f"<p>{content}</p>",
+            ))
+        for _ in range(10):
+            article = rng.choice(articles)
+            article.content = f"<p>{' '.join(rng.sample(WORDS, 4))}</p>"
+            article.save()
+        articles.pop(rng.randrange(len(articles))).delete()
+        incremental = self.stored_index()
+        rebuild_article_index()
+        self.assertEqual(incremental, self.stored_index())
+
+    def test_articles_sharing_no_more_terms_are_unlisted(self):
+        listing = create_article(title="Kopi Susu", content="<p>kopi susu gula</p>")
+        article = create_article(title="Es Kopi", content="<p>kopi es batu</p>")
+        self.assertEqual([pk for pk, _ in ArticleIndex.objects.get(article=listing).related], [article.pk])
+        article.title, article.content = "Roti Keju", "<p>roti keju madu</p>"
+        article.save()
+        self.assertEqual(ArticleIndex.objects.get(article=listing).related, [])
+
+    def test_saves_only_score_articles_sharing_terms(self):
+        create_article(title="Kopi Susu", content="<p>kopi susu gula</p>")
+        create_article(title="Roti Keju", content="<p>roti keju madu</p>")
+        with unittest.mock.patch("main.related.term_overlap", wraps=related.term_overlap) as overlap:
+            article = create_article(title="Es Kopi", content="<p>kopi es batu</p>")
+        self.assertEqual(overlap.call_count, 1)
+        self.assertEqual([pk for pk, _ in article.index.related], [Article.objects.get(title="Kopi Susu").pk])
+
+
+class ArticleBatchTests(ApiTestCase):
+    def setUp(self):
+        create_article()
+        create_article(title="Edisi Kedua", published_at=datetime.date(2024, 2, 1))
+
+    def test_results_follow_request_order(self):
+        response = self.client.get("/api/wawasan/batch/?slugs=edisi-kedua,hilang,edisi-pertama,edisi-kedua")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([result["slug"] for result in data["results"]], ["edisi-kedua", "edisi-pertama"])
+        self.assertEqual(data["missing"], ["hilang"])
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/wawasan/batch/?slugs=edisi-kedua,edisi-pertama")
+        self.assertEqual(cached.json()["results"], data["results"])
+
+    def test_post_body(self):
+        response = self.client.post("/api/wawasan/batch/", {"slugs": ["edisi-pertama"]}, content_type="application/json")
+        self.assertEqual([result["slug"] for result in response.json()["results"]], ["edisi-pertama"])
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in (["edisi-pertama"], "edisi-pertama", {"slugs": "edisi-pertama"}, {"slugs": ["edisi-pertama", 1]}, {"slugs": [None]}):
+            with self.subTest(body=body):
+                response = self.client.post("/api/wawasan/batch/", body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_limits_slugs_per_request(self):
+        slugs = ",".join(f"edisi-{number}" for number in range(51))
+        self.assertEqual(self.client.get(f"/api/wawasan/batch/?slugs={slugs}").status_code, 400)
+        self.assertEqual(self.client.get("/api/wawasan/batch/?slugs=,").status_code, 400)
+
+
+class MissingSnapshotTests(ApiTestCase):
+    def setUp(self):
+        create_article()
+        create_article(title="Edisi Kedua", published_at=datetime.date(2024, 2, 1))
+        ArticleSnapshot.objects.filter(slug="edisi-pertama").delete()
+
+    def test_list_includes_articles_without_snapshots(self):
+        response = self.client.get("/api/wawasan/")
+        self.assertEqual([article["slug"] for article in response.json()["results"]], ["edisi-kedua", "edisi-pertama"])
+        self.assertTrue(ArticleSnapshot.objects.filter(slug="edisi-pertama").exists())
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_batch_builds_missing_snapshots(self):
+        response = self.client.get("/api/wawasan/batch/?slugs=edisi-pertama,edisi-kedua")
+        data = response.json()
+        self.assertEqual([result["slug"] for result in data["results"]], ["edisi-pertama", "edisi-kedua"])
+        self.assertEqual(data["missing"], [])
+        self.assertTrue(ArticleSnapshot.objects.filter(slug="edisi-pertama").exists())
+
+
+class MediaTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name, MEDIA_OFFLOAD=""))
+        with open(os.path.join(media_root.name, "laporan.txt"), "wb") as file:
+            file.write(b"0123456789")
+
+    def test_parse_range(self):
+        cases = {
+            "bytes=0-3": (0, 3),
+            "bytes=5-": (5, 9),
+            "bytes=-4": (6, 9),
+            "bytes=-20": (0, 9),
+            "bytes=8-20": (8, 9),
+            "bytes=10-": False,
+            "bytes=4-2": False,
+            "bytes=-0": False,
+            "bytes=0-1,4-5": None,
+            "items=0-1": None,
+            "bytes=-": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 10), expected)
+
+    def test_serves_ranges(self):
+        response = self.client.get("/media/laporan.txt", HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        response = self.client.get("/media/laporan.txt", HTTP_RANGE="bytes=10-")
+        self.assertEqual((response.status_code, response["Content-Range"]), (416, "bytes */10"))
+
+    def test_if_range_needs_a_strong_match(self):
+        etag = self.client.get("/media/laporan.txt")["ETag"]
+        for if_range, status in ((etag, 206), (f"W/{etag}", 200), ('"lain"', 200)):
+            with self.subTest(if_range=if_range):
+                response = self.client.get("/media/laporan.txt", HTTP_RANGE="bytes=2-4", HTTP_IF_RANGE=if_range)
+                self.assertEqual(response.status_code, status)
+
+    def test_only_content_hashed_names_are_immutable(self):
+        self.assertTrue(is_hashed_name(f"uploads/{hashed_name('image', 'ab12' * 6, '.jpg')}"))
+        for name in ("uploads/20241101123456.jpg", "uploads/foto-1730419200000.png", "uploads/deadbeefcafe.jpg"):
+            with self.subTest(name=name):
+                self.assertFalse(is_hashed_name(name))
+
+
+class NewsletterUnsubscribeTests(ApiTestCase):
+    def setUp(self):
+        self.client = self.client_class(enforce_csrf_checks=True)
+        NewsletterSubscriber.objects.create(email="budi@example.com")
+        self.url = unsubscribe_url("budi@example.com", "")
+
+    def test_get_only_asks_for_confirmation(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "budi@example.com")
+        self.assertContains(response, '<form method="post">')
+        self.assertTrue(NewsletterSubscriber.objects.filter(email="budi@example.com").exists())
+
+    def test_one_click_post_unsubscribes(self):
+        response = self.client.post(self.url, {"List-Unsubscribe": "One-Click"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(NewsletterSubscriber.objects.filter(email="budi@example.com").exists())
+
+    def test_post_works_in_a_staff_session(self):
+        self.client.force_login(User.objects.create_user("staf", is_staff=True))
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(NewsletterSubscriber.objects.filter(email="budi@example.com").exists())
+
+    def test_forged_tokens_are_rejected(self):
+        self.assertEqual(self.client.post("/api/unsubscribe/palsu/").status_code, 400)
+        self.assertTrue(NewsletterSubscriber.objects.filter(email="budi@example.com").exists())
+
+
+class CompiledTemplateTests(SimpleTestCase):
+    def test_fills_every_slot(self):
+        template = CompiledTemplate(f"Halo {slot('email')}, {slot('email')}! {slot('unsubscribe_url')}")
+        self.assertEqual(template.render({"email": "budi", "unsubscribe_url": "/u/"}), "Halo budi, budi! /u/")
+        self.assertEqual(CompiledTemplate("Tanpa slot").render({}), "Tanpa slot")
+
+    def test_values_are_not_read_as_slots(self):
+        template = CompiledTemplate(f"{slot('email')} {slot('unsubscribe_url')}")
+        self.assertEqual(template.render({"email": slot("unsubscribe_url"), "unsubscribe_url": "/u/"}), f"{slot('unsubscribe_url')} /u/")
+
+
+@override_settings(SITE_URL=SITE_URL, EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class PersonalizedSendTests(TestCase):
+    def setUp(self):
+        self.emails = ["budi@example.com", '"<b>siti</b>"@example.com']
+        for email in self.emails:
+            NewsletterSubscriber.objects.create(email=email)
+        self.campaign = NewsletterCampaign.objects.create(subject="Kabar Pribadi", body="<p>Halo</p>")
+
+    def sent(self):
+        # Other tests' background sends may land in the outbox too.
+        return {message.to[0]: message for message in mail.outbox if message.subject == "Kabar Pribadi"}
+
+    def test_each_recipient_gets_their_email_and_unsubscribe_url(self):
+        self.assertEqual(self.campaign.send_to_subscribers(), 2)
+        sent = self.sent()
+        for email in self.emails:
+            url = unsubscribe_url(email, SITE_URL)
+            html = sent[email].alternatives[0][0]
+            self.assertIn(f"Dikirim ke {escape(email)}.", html)
+            self.assertIn(f'href="{escape(url)}"', html)
+            self.assertIn(f"Berhenti berlangganan: {url}", sent[email].body)
+            self.assertEqual(sent[email].extra_headers["List-Unsubscribe"], f"<{url}>")
+            self.assertEqual(sent[email].extra_headers["List-Unsubscribe-Post"], "List-Unsubscribe=One-Click")
+
+    def test_email_cannot_inject_markup(self):
+        self.campaign.send_to_subscribers()
+        html = self.sent()['"<b>siti</b>"@example.com'].alternatives[0][0]
+        self.assertNotIn("<b>siti</b>", html)
+        self.assertIn("&quot;&lt;b&gt;siti&lt;/b&gt;&quot;@example.com", html)
+
+    def test_bodies_are_compiled_once_per_send(self):
+        NewsletterSubscriber.objects.create(email="dewi@example.com")
+        renders = []
+        render_html_body = NewsletterCampaign._render_html_body
+
+        def counting_render(campaign, *args, **kwargs):
+            renders.append(campaign.pk)
+            return render_html_body(campaign, *args, **kwargs)
+
+        with (
+            unittest.mock.patch("main.models.CompiledTemplate", wraps=CompiledTemplate) as compiled,
+            unittest.mock.patch.object(NewsletterCampaign, "_render_html_body", counting_render),
+        ):
+            self.assertEqual(self.campaign.send_to_subscribers(), 3)
+        self.assertEqual(compiled.call_count, 2)
+        self.assertEqual(renders, [self.campaign.pk])
+
+
+class MetricsTests(ApiTestCase):
+    def test_endpoint_is_off_without_a_token(self):
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="rahasia")
+    def test_endpoint_needs_the_token(self):
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer salah").status_code, 401)
+        self.client.get("/api/wawasan/")
+        response = self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer rahasia")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"corvidian_request_duration_seconds", response.content)
+
+    def test_queries_are_not_counted_twice(self):
+        timings, token = start_request()
+        try:
+            with timed("serialize"):
+                timings.db_wrapper(lambda *args: time.sleep(0.05), "SELECT 1", (), False, {})
+        finally:
+            end_request(token)
+        self.assertGreaterEqual(timings.phases["db"], 0.05)
+        self.assertLess(timings.phases["serialize"], 0.01)
+
+    def test_server_timing_phases_fit_in_the_total(self):
+        create_article()
+        response = self.client.get("/api/wawasan/slug/edisi-pertama/?content=raw")
+        phases = dict(part.split(";dur=") for part in response["Server-Timing"].split(", ") if ";dur=" in part)
+        total = float(phases.pop("total"))
+        self.assertIn("db", phases)
+        self.assertLessEqual(sum(map(float, phases.values())), total)
+
+
+@override_settings(FRONTEND_URL="https://www.corvidian.io")
+class FeedTests(ApiTestCase):
+    def setUp(self):
+        create_article()
+        self.newest = create_article(title="Edisi Kedua", published_at=datetime.date(2024, 2, 1))
+
+    def test_rss_names_authors_with_dc_creator(self):
+        response = self.client.get("/api/wawasan/rss/")
+        channel = ElementTree.fromstring(response.content).find("channel")
+        items = channel.findall("item")
+        self.assertEqual([item.findtext("link") for item in items], [
+            "https://www.corvidian.io/wawasan/edisi-kedua", "https://www.corvidian.io/wawasan/edisi-pertama",
+        ])
+        self.assertEqual(items[0].findtext("{http://purl.org/dc/elements/1.1/}creator"), "Tim")
+        self.assertIsNone(items[0].find("author"))
+
+    def test_build_dates_follow_the_newest_article(self):
+        rss = ElementTree.fromstring(self.client.get("/api/wawasan/rss/").content)
+        atom = self.client.get("/api/wawasan/atom/")
+        self.newest.refresh_from_db()
+        self.assertEqual(
+            rss.find("channel").findtext("lastBuildDate"),
+            self.newest.updated_at.strftime("%a, %d %b %Y %H:%M:%S +0000"),
+        )
+        updated = ElementTree.fromstring(atom.content).findtext("{http://www.w3.org/2005/Atom}updated")
+        self.assertEqual(datetime.datetime.fromisoformat(updated), self.newest.updated_at)
+
+    def test_regenerating_unchanged_feeds_keeps_validators(self):
+        etag = self.client.get("/api/wawasan/atom/")["ETag"]
+        regenerate_feed_documents()
+        response = self.client.get("/api/wawasan/atom/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(FeedDocument.objects.get(name="atom").last_modified, self.newest.updated_at)
+
+    def test_deleting_the_newest_article_moves_last_modified_forward(self):
+        first = self.client.get("/api/wawasan/rss/")
+        self.newest.delete()
+        response = self.client.get("/api/wawasan/rss/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b"edisi-kedua", response.content)
+        self.assertGreater(parse_http_date(response["Last-Modified"]), parse_http_date(first["Last-Modified"]))
+        channel = ElementTree.fromstring(response.content).find("channel")
+        self.assertEqual(channel.findtext("lastBuildDate"), response["Last-Modified"].replace("GMT", "+0000"))
+
+
+def image_bytes(size, format="JPEG", **kwargs):
+    output = io.BytesIO()
+    Image.new("RGB", size, "teal").save(output, format=format, **kwargs)
+    return output.getvalue()
+
+
+class OptimizingImageBackendTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        originals_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.addCleanup(originals_root.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root.name, CKEDITOR_ORIGINALS_ROOT=originals_root.name, CKEDITOR_IMAGE_MAX_DIMENSION=1600,
+        ))
+        self.media_root, self.originals_root = media_root.name, originals_root.name
+
+    def save(self, content, filepath="newsletter/uploads/2024/11/01/foto.jpg"):
+        return OptimizingImageBackend(default_storage, SimpleUploadedFile("foto.jpg", content)).save_as(filepath)
+
+    def test_resizes_and_deduplicates(self):
+        exif = Image.Exif()
+        exif[0x8825] = {1: "S", 2: (6.0, 10.0, 0.0)}
+        original = image_bytes((3200, 1600), exif=exif)
+        path = self.save(original)
+        self.assertRegex(path, r"^newsletter/uploads/hashed/([0-9a-f]{2})/image\.hash-\1[0-9a-f]{22}\.jpg$")
+        with default_storage.open(path) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (1600, 800))
+            self.assertNotIn(0x8825, image.getexif())
+        self.assertTrue(default_storage.exists(path.replace(".jpg", "_thumb.jpg")))
+        self.assertEqual(self.save(original), path)
+
+    def test_originals_are_kept_outside_media(self):
+        original = image_bytes((800, 600))
+        self.save(original)
+        archived = os.listdir(self.originals_root)
+        self.assertEqual(len(archived), 1)
+        with open(os.path.join(self.originals_root, archived[0]), "rb") as file:
+            self.assertEqual(file.read(), original)
+        media_files = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertNotIn(archived[0], media_files)
+
+    def test_animated_images_are_stored_as_is(self):
+        frames = [Image.new("RGB", (40, 40), color) for color in ("red", "blue")]
+        output = io.BytesIO()
+        frames[0].save(output, format="GIF", save_all=True, append_images=frames[1:])
+        path = self.save(output.getvalue(), "newsletter/uploads/animasi.gif")
+        self.assertTrue(path.endswith(".gif"))
+        with default_storage.open(path) as file:
+            self.assertEqual(file.read(), output.getvalue())
+        self.assertFalse(default_storage.exists(path.replace(".gif", "_thumb.gif")))
+
+    def test_identical_content_is_stored_once(self):
+        original = image_bytes((800, 600))
+        path = self.save(original)
+        self.assertEqual(self.save(original, "newsletter/uploads/2025/03/09/salinan.jpg"), path)
+        self.assertNotEqual(self.save(image_bytes((800, 601))), path)
+        stored = [name for _, _, names in os.walk(self.media_root) for name in names if "_thumb" not in name]
+        self.assertEqual(len(stored), 2)
+
+    @override_settings(CKEDITOR_RESTRICT_BY_USER=True)
+    def test_editor_uploads_share_the_content_path(self):
+        content = image_bytes((800, 600))
+        urls = []
+        for username, filename in (("staf", "Foto Kantor.jpg"), ("editor", "kantor-baru.jpg")):
+            self.client.force_login(User.objects.create_user(username, is_staff=True))
+            upload = SimpleUploadedFile(filename, content, content_type="image/jpeg")
+            urls.append(self.client.post("/ckeditor/upload/", {"upload": upload}).json()["url"])
+        self.assertRegex(urls[0], r"^/media/newsletter/uploads/hashed/[0-9a-f]{2}/image\.hash-[0-9a-f]{24}\.jpg$")
+        self.assertEqual(urls[1], urls[0])
+
+
+class SubscriberKeysetTests(TestCase):
+    def setUp(self):
+        moments = [datetime.datetime(2024, 1, day, tzinfo=datetime.timezone.utc) for day in (3, 1, 2, 1, 3, 2)]
+        for number, created_at in enumerate(moments):
+            subscriber = NewsletterSubscriber.objects.create(email=f"pelanggan{number}@example.com", source="footer" if number % 2 else "blog")
+            # auto_now_add ignores the value given to create().
+            NewsletterSubscriber.objects.filter(pk=subscriber.pk).update(created_at=created_at)
+
+    def emails(self, subscribers, **kwargs):
+        return [email.removeprefix("pelanggan").removesuffix("@example.com") for email in iter_subscriber_emails(subscribers, **kwargs)]
+
+    def test_walks_in_pk_order(self):
+        self.assertEqual(self.emails(NewsletterSubscriber.objects.all(), chunk_size=2), list("012345"))
+        self.assertEqual(self.emails(NewsletterSubscriber.objects.filter(source="footer"), chunk_size=2), list("135"))
+
+    def test_walks_sign_up_windows_in_created_order(self):
+        window = NewsletterSubscriber.objects.filter(created_at__gte=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        with CaptureQueriesContext(connections["default"]) as queries:
+            emails = self.emails(window, chunk_size=2, by_sign_up=True)
+        self.assertEqual(emails, list("132504"))
+        self.assertEqual(len(queries), 4)
+        self.assertIn('"main_newslettersubscriber"."created_at" > ', queries[1]["sql"])
+
+    @override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+    def test_campaign_reaches_the_whole_window(self):
+        campaign = NewsletterCampaign.objects.create(
+            subject="Kabar", body="<p>Halo</p>",
+            segment_subscribed_after=datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc),
+            segment_subscribed_before=datetime.datetime(2024, 1, 3, tzinfo=datetime.timezone.utc),
+        )
+        with override_settings(NEWSLETTER_SEND_CHUNK_SIZE=1):
+            self.assertEqual(campaign.send_to_subscribers(), 2)
+        # Other tests' background sends may land in the outbox too.
+        recipients = sorted(message.to[0] for message in mail.outbox if message.subject == "Kabar")
+        self.assertEqual(recipients, ["pelanggan2@example.com", "pelanggan5@example.com"])
+
+
+class ArticleFieldsetTests(ApiTestCase):
+    def setUp(self):
+        create_article()
+
+    def test_parse_fieldset(self):
+        self.assertIsNone(parse_fieldset({}, ArticleListSerializer))
+        self.assertEqual(parse_fieldset({"fields": "title, slug"}, ArticleListSerializer), ("slug", "title"))
+        self.assertEqual(parse_fieldset({"fields": "title,slug,excerpt", "omit": "excerpt"}, ArticleListSerializer), ("slug", "title"))
+        self.assertIsNone(parse_fieldset({"fields": ",".join(ArticleListSerializer.Meta.fields)}, ArticleListSerializer))
+
+    def test_list_fields_and_omit(self):
+        response = self.client.get("/api/wawasan/?fields=slug,title")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [{"slug": "edisi-pertama", "title": "Edisi Pertama"}])
+        result = self.client.get("/api/wawasan/?omit=excerpt,cover_image").json()["results"][0]
+        self.assertEqual(set(result), set(ArticleListSerializer.Meta.fields) - {"excerpt", "cover_image"})
+
+    def test_detail_fields(self):
+        response = self.client.get("/api/wawasan/slug/edisi-pertama/?fields=title,content")
+        self.assertEqual(response.json(), {"title": "Edisi Pertama", "content": "<p>Isi</p>"})
+        detail = self.client.get("/api/wawasan/slug/edisi-pertama/?omit=previous,next,related").json()
+        self.assertNotIn("related", detail)
+        self.assertEqual(detail["slug"], "edisi-pertama")
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get("/api/wawasan/?fields=rahasia").status_code, 400)
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/?omit=" + ",".join(ArticleDetailSerializer.Meta.fields)).status_code, 400)
+
+
+class TagInvalidationTests(ApiTestCase):
+    def setUp(self):
+        self.article = create_article()
+
+    def test_invalidating_a_tag_changes_only_its_keys(self):
+        article_key = tagged_key("detail", [article_tag("edisi-pertama")])
+        list_key = tagged_key("list", [ARTICLE_LIST_TAG])
+        invalidate_tags(article_tag("edisi-pertama"))
+        self.assertNotEqual(tagged_key("detail", [article_tag("edisi-pertama")]), article_key)
+        self.assertEqual(tagged_key("list", [ARTICLE_LIST_TAG]), list_key)
+
+    def test_queryset_update_refreshes_cached_responses(self):
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").json()["title"], "Edisi Pertama")
+        self.assertEqual(self.client.get("/api/wawasan/").json()["results"][0]["title"], "Edisi Pertama")
+        Article.objects.filter(pk=self.article.pk).update(title="Edisi Revisi")
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").json()["title"], "Edisi Revisi")
+        self.assertEqual(self.client.get("/api/wawasan/").json()["results"][0]["title"], "Edisi Revisi")
+
+    def test_slug_update_drops_the_old_detail(self):
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").status_code, 200)
+        Article.objects.filter(pk=self.article.pk).update(slug="edisi-baru")
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").status_code, 404)
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-baru/").status_code, 200)
+
+    def test_queryset_delete_refreshes_cached_responses(self):
+        self.assertEqual(len(self.client.get("/api/wawasan/").json()["results"]), 1)
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").status_code, 200)
+        Article.objects.filter(pk=self.article.pk).delete()
+        self.assertEqual(self.client.get("/api/wawasan/").json()["results"], [])
+        self.assertEqual(self.client.get("/api/wawasan/slug/edisi-pertama/").status_code, 404)
+
+    def test_bulk_create_refreshes_the_list(self):
+        self.assertEqual(len(self.client.get("/api/wawasan/").json()["results"]), 1)
+        Article.objects.bulk_create([
+            Article(title="Edisi Kedua", slug="edisi-kedua", author="Tim", published_at=datetime.date(2024, 2, 1), content="<p>Isi</p>"),
+        ])
+        self.assertEqual([result["slug"] for result in self.client.get("/api/wawasan/").json()["results"]], ["edisi-kedua", "edisi-pertama"])
+
+    def test_newsletter_update_invalidates_its_tag(self):
+        message = NewsletterWelcomeMessage.objects.create(subject="Selamat datang", body="<p>Halo</p>")
+        campaign = NewsletterCampaign.objects.create(subject="Kabar Bulanan")
+        message_key = tagged_key("body", [newsletter_tag(NewsletterWelcomeMessage, message.pk)])
+        campaign_key = tagged_key("body", [newsletter_tag(NewsletterCampaign, campaign.pk)])
+        NewsletterWelcomeMessage.objects.filter(pk=message.pk).update(body="<p>Halo lagi</p>")
+        self.assertNotEqual(tagged_key("body", [newsletter_tag(NewsletterWelcomeMessage, message.pk)]), message_key)
+        self.assertEqual(tagged_key("body", [newsletter_tag(NewsletterCampaign, campaign.pk)]), campaign_key)
+
+
+class BootImportTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       300 |        420 | main.models\n"
+        )
+        self.assertEqual(parse_importtime(output), [("_io", 120, 120, 1), ("main.models", 300, 420, 0)])
+
+    def test_worker_boot_leaves_out_pillow_and_beautifulsoup(self):
+        stdout = io.StringIO()
+        call_command("profile_imports", "--check", "PIL", "--check", "bs4", "--json", stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report["unexpected"], [])
+        self.assertGreater(report["modules"], 0)
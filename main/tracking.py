@@ -0,0 +1,102 @@
+import functools
+import html as html_lib
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.html import escape
+
+from .buffering import BufferedFlusher
+from .models import NewsletterCampaign, NewsletterCampaignStat
+
+
+OPEN_SALT = "newsletter.open"
+CLICK_SALT = "newsletter.click"
+TRACKING_FLUSH_INTERVAL = getattr(settings, "TRACKING_FLUSH_INTERVAL", 10)
+TRACKING_FLUSH_BATCH = getattr(settings, "TRACKING_FLUSH_BATCH", 1000)
+HREF_RE = re.compile(r'(<a\b[^>]*?\bhref=")(https?://[^"]+)(")', re.IGNORECASE)
+TRANSPARENT_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+    b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+
+def open_pixel_url(campaign_pk, site_url):
+    return f"{site_url}/api/newsletter/o/{signing.dumps(campaign_pk, salt=OPEN_SALT)}.gif"
+
+
+def click_url(campaign_pk, url, site_url):
+    token = signing.dumps([campaign_pk, url], salt=CLICK_SALT, compress=True)
+    return f"{site_url}/api/newsletter/c/{token}/"
+
+
+def add_tracking(html, campaign_pk, site_url):
+    """Route the body's http(s) links through the click redirect and append
+    the open pixel. Tokens are per campaign and link, not per recipient, so
+    this runs once per send."""
+    def rewrite(match):
+        url = html_lib.unescape(match.group(2))
+        return f"{match.group(1)}{escape(click_url(campaign_pk, url, site_url))}{match.group(3)}"
+
+    html = HREF_RE.sub(rewrite, html)
+    pixel = f'<img src="{open_pixel_url(campaign_pk, site_url)}" width="1" height="1" alt="" style="display:block;border:0;width:1px;height:1px;" />'
+    return html.replace("</body>", f"{pixel}</body>", 1)
+
+
+@functools.lru_cache(maxsize=1024)
+def read_open_token(token):
+    return signing.loads(token, salt=OPEN_SALT)
+
+
+@functools.lru_cache(maxsize=4096)
+def read_click_token(token):
+    campaign_pk, url = signing.loads(token, salt=CLICK_SALT)
+    return campaign_pk, url
+
+
+class EngagementRecorder(BufferedFlusher):
+    """Counts opens and clicks in memory and adds them to
+    NewsletterCampaignStat in one transaction per flush."""
+
+    def new_buffer(self):
+        return Counter()
+
+    def buffer_item(self, buffer, item):
+        buffer[item] += 1
+
+    def requeue(self, buffer, failed):
+        buffer.update(failed)
+
+    def flush_items(self, counts):
+        with transaction.atomic():
+            # Foreign keys are checked at commit, where one row of a deleted
+            # campaign would fail the whole flush; its counts are dropped.
+            campaign_pks = set(
+                NewsletterCampaign.objects.filter(pk__in={key[0] for key in counts}).values_list("pk", flat=True)
+            )
+            for (campaign_pk, event, url), count in counts.items():
+                if campaign_pk not in campaign_pks:
+                    continue
+                lookup = {"campaign_id": campaign_pk, "event": event, "url_hash": NewsletterCampaignStat.hash_url(url)}
+                if NewsletterCampaignStat.objects.filter(**lookup).update(count=F("count") + count):
+                    continue
+                try:
+                    with transaction.atomic():
+                        NewsletterCampaignStat.objects.create(count=count, url=url, **lookup)
+                except IntegrityError:
+                    # Created by another worker meanwhile.
+                    NewsletterCampaignStat.objects.filter(**lookup).update(count=F("count") + count)
+
+
+engagement = EngagementRecorder(TRACKING_FLUSH_INTERVAL, TRACKING_FLUSH_BATCH)
+
+
+def record_open(campaign_pk):
+    engagement.add((campaign_pk, NewsletterCampaignStat.EVENT_OPEN, ""))
+
+
+def record_click(campaign_pk, url):
+    engagement.add((campaign_pk, NewsletterCampaignStat.EVENT_CLICK, url))
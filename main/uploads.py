@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+
+from ckeditor_uploader.backends import PillowBackend
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps
+
+from .media import hashed_name
+
+
+def has_transparency(image):
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def encode_image(image):
+    """Return ``(content, extension)``: ``image`` as an optimized PNG when it
+    has transparency, otherwise as a progressive JPEG at
+    CKEDITOR_IMAGE_QUALITY."""
+    output = io.BytesIO()
+    if has_transparency(image):
+        image.save(output, format="PNG", optimize=True)
+        return output.getvalue(), ".png"
+    image.convert("RGB").save(
+        output,
+        format="JPEG",
+        quality=getattr(settings, "CKEDITOR_IMAGE_QUALITY", 80),
+        optimize=True,
+        progressive=True,
+    )
+    return output.getvalue(), ".jpg"
+
+
+def originals_storage():
+    """Where the uploaded originals are archived: outside MEDIA_ROOT, since
+    they keep their EXIF metadata, GPS position included."""
+    return FileSystemStorage(location=settings.CKEDITOR_ORIGINALS_ROOT, base_url=None)
+
+
+def content_path(digest, extension):
+    """Storage path of the optimized copy of an upload whose original has
+    the SHA-256 ``digest``."""
+    return os.path.join(
+        getattr(settings, "CKEDITOR_UPLOAD_PATH", ""), "hashed", digest[:2], hashed_name("image", digest[:24], extension)
+    )
+
+
+class OptimizingImageBackend(PillowBackend):
+    """CKEditor image backend that stores a resized, re-encoded copy of each
+    upload under a name derived from the upload's content alone, and
+    archives the original.
+
+    Copies live in ``hashed/`` under CKEDITOR_UPLOAD_PATH rather than the
+    per-user or dated directory django-ckeditor chose, so the same image
+    uploaded under any name, by anyone, on any day is optimized and stored
+    once, and served with the immutable cache headers of ``main.media``.
+    Images are encoded as JPEG (PNG when they have transparency) rather than
+    WebP: newsletter bodies embed the same files and many mail clients
+    cannot show WebP.
+    """
+
+    def save_as(self, filepath):
+        if not self.is_image:
+            return super().save_as(filepath)
+
+        original = self.file_object.read()
+        digest = hashlib.sha256(original).hexdigest()
+        extension = os.path.splitext(filepath)[1]
+        self._archive_original(original, digest, extension.lower())
+
+        image = Image.open(io.BytesIO(original))
+        is_animated = getattr(image, "is_animated", False)
+        if is_animated:
+            content, extension = original, extension.lower()
+        else:
+            content, extension = self._optimize(image, original, extension.lower())
+        saved_path = content_path(digest, extension)
+        if self.storage_engine.exists(saved_path):
+            return saved_path
+        saved_path = self.storage_engine.save(saved_path, ContentFile(content))
+        if not is_animated:
+            self.create_thumbnail(io.BytesIO(content), saved_path)
+        return saved_path
+
+    def _archive_original(self, original, digest, extension):
+        storage = originals_storage()
+        name = f"{digest}{extension}"
+        if not storage.exists(name):
+            storage.save(name, ContentFile(original))
+
+    def _optimize(self, image, original, extension):
+        """Return ``(content, extension)``: ``image`` capped at
+        CKEDITOR_IMAGE_MAX_DIMENSION pixels and re-encoded, or the original
+        when that is not smaller."""
+        max_dimension = getattr(settings, "CKEDITOR_IMAGE_MAX_DIMENSION", 1600)
+        resized = max(image.size) > max_dimension
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        content, optimized_extension = encode_image(image)
+        if not resized and len(content) >= len(original):
+            return original, extension
+        return content, optimized_extension
@@ -1,10 +1,31 @@
 from django.urls import path, include
-from .views import ArticleViewSet, ArticleDetailBySlugView, ConsultationSubmitView, NewsletterSubscribeView
+from .views import (
+    ArticleViewSet,
+    ArticleBatchBySlugView,
+    ArticleDetailBySlugView,
+    ConsultationSubmitView,
+    MetricsView,
+    NewsletterSubscribeView,
+    NewsletterUnsubscribeView,
+    article_atom_feed,
+    article_rss_feed,
+    newsletter_click_redirect,
+    newsletter_open_pixel,
+    sitemap,
+)
 
 
 urlpatterns = [
     path('wawasan/', ArticleViewSet.as_view({'get': 'list'}), name='article-list'),
     path('wawasan/slug/<slug:slug>/', ArticleDetailBySlugView.as_view(), name='article-detail-by-slug'),
+    path('wawasan/batch/', ArticleBatchBySlugView.as_view(), name='article-batch-by-slug'),
+    path('wawasan/rss/', article_rss_feed, name='article-rss-feed'),
+    path('wawasan/atom/', article_atom_feed, name='article-atom-feed'),
+    path('sitemap.xml', sitemap, name='sitemap'),
     path("consultation/submit/", ConsultationSubmitView.as_view(), name="consultation-submit"),
     path("subscribe/", NewsletterSubscribeView.as_view()),
+    path("unsubscribe/<str:token>/", NewsletterUnsubscribeView.as_view(), name="newsletter-unsubscribe"),
+    path("newsletter/o/<str:token>.gif", newsletter_open_pixel, name="newsletter-open-pixel"),
+    path("newsletter/c/<str:token>/", newsletter_click_redirect, name="newsletter-click"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
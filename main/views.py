@@ -1,34 +1,78 @@
-import threading
 import urllib.parse
 from django.conf import settings
+from django.core import signing
 from django.core.cache import cache
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.http import Http404
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.html import escape
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
 from rest_framework import status
 from rest_framework import viewsets, generics
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import (
-    ARTICLE_LIST_CACHE_KEY,
     Article,
+    ArticleSnapshot,
     ConsultationLead,
     NewsletterSubscriber,
     NewsletterWelcomeMessage,
     article_detail_cache_key,
+    article_detail_cache_keys,
+    article_list_cache_key,
+    read_unsubscribe_token,
+)
+from .feeds import ATOM, FEED_CONTENT_TYPES, RSS, SITEMAP, get_feed_document
+from .cache_tags import ARTICLE_LIST_TAG, article_tag
+from .cdn import EdgeCacheMixin
+from .mail import send_in_background
+from .metrics import record_cache, render_prometheus, timed
+from .notifications import notify_consultation, notify_new_subscriber
+from .payloads import EncodedPayload, encoded_response
+from .routers import ReplicaReadMixin, unpinned_writes
+from .serializers import (
+    ArticleDetailSerializer,
+    ArticleListSerializer,
+    article_only_fields,
+    parse_fieldset,
+    wants_raw_content,
+)
+from .tracking import TRANSPARENT_GIF, read_click_token, read_open_token, record_click, record_open
+from .snapshots import (
+    get_detail_snapshot,
+    summary_snapshots,
+    with_absolute_urls,
+    write_article_snapshot,
+    write_missing_article_snapshots,
 )
-from .serializers import ArticleDetailSerializer, ArticleListSerializer
 
 
 CACHE_TIMEOUT = getattr(settings, "CACHE_TTL", 300)
+ARTICLE_BATCH_LIMIT = 50
 
 
-def run_async(target, *args, **kwargs):
-    threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True).start()
+def cached_payload_response(request, payload):
+    # The same URL is rendered as JSON or as the browsable API; an edge
+    # cache must keep them apart.
+    if request.accepted_renderer.format == "json":
+        response = encoded_response(request, payload)
+    else:
+        response = Response(payload.data())
+    patch_vary_headers(response, ("Accept",))
+    return response
 
-class ArticleViewSet(viewsets.ModelViewSet):
+
+class ArticleViewSet(EdgeCacheMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all().order_by('-published_at')
 
+    def get_surrogate_keys(self, request):
+        # Purged on every article write, so it also covers single articles.
+        return [ARTICLE_LIST_TAG]
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ArticleListSerializer
@@ -37,51 +81,218 @@ class ArticleViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         if getattr(self, 'action', None) == 'list':
-            return queryset.defer('content')
+            return queryset.defer('content', 'optimized_content')
         return queryset
 
     def list(self, request, *args, **kwargs):
-        cache_key = ARTICLE_LIST_CACHE_KEY if not request.query_params else None
+        fields = parse_fieldset(request.query_params, ArticleListSerializer)
+        cache_key = None
+        page_number = request.query_params.get('page', '1')
+        if set(request.query_params) <= {'page', 'fields', 'omit'} and page_number.isdigit():
+            cache_key = article_list_cache_key(int(page_number), fields)
         if cache_key:
-            cached = cache.get(cache_key)
-            if cached:
-                return Response(cached)
+            with timed("cache"):
+                cached = cache.get(cache_key)
+            record_cache(cached is not None)
+            if cached is not None:
+                return cached_payload_response(request, cached)
+        if fields:
+            return self._list_from_queryset(request, cache_key, fields)
+        with timed("snapshot"):
+            incomplete = Article.objects.filter(snapshot__isnull=True).exists()
+        if incomplete:
+            # Snapshots not built yet (e.g. before the first release step).
+            # The replica may lag behind the rows written here, so this
+            # request is served from the articles themselves.
+            with unpinned_writes():
+                write_missing_article_snapshots()
+            return self._list_from_queryset(request, cache_key)
+        with timed("snapshot"):
+            snapshots = summary_snapshots()
+            page = self.paginate_queryset(snapshots)
+            rows = list(snapshots) if page is None else page
+        data = [with_absolute_urls(row, request) for row in rows]
+        if page is not None:
+            data = self.get_paginated_response(data).data
+        if not cache_key:
+            return Response(data)
+        with timed("encode"):
+            payload = EncodedPayload(data)
+        cache.set(cache_key, payload, CACHE_TIMEOUT)
+        return cached_payload_response(request, payload)
+
+    def _list_from_queryset(self, request, cache_key, fields=None):
         queryset = self.filter_queryset(self.get_queryset())
+        if fields:
+            queryset = queryset.only(*article_only_fields(fields))
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            response = self.get_paginated_response(serializer.data)
-            if cache_key:
-                cache.set(cache_key, response.data, CACHE_TIMEOUT)
-            return response
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
-        if cache_key:
-            cache.set(cache_key, data, CACHE_TIMEOUT)
-        return Response(data)
+            serializer = self.get_serializer(page, many=True, fields=fields)
+            with timed("serialize"):
+                data = serializer.data
+            data = self.get_paginated_response(data).data
+        else:
+            serializer = self.get_serializer(queryset, many=True, fields=fields)
+            with timed("serialize"):
+                data = serializer.data
+        if not cache_key:
+            return Response(data)
+        with timed("encode"):
+            payload = EncodedPayload(data)
+        cache.set(cache_key, payload, CACHE_TIMEOUT)
+        return cached_payload_response(request, payload)
 
 
-class ArticleDetailBySlugView(generics.RetrieveAPIView):
+class ArticleDetailBySlugView(EdgeCacheMixin, ReplicaReadMixin, generics.RetrieveAPIView):
     queryset = Article.objects.all()
     serializer_class = ArticleDetailSerializer
     lookup_field = 'slug'
+    sparse_fields = None
+
+    def get_surrogate_keys(self, request):
+        return [article_tag(self.kwargs[self.lookup_field])]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.sparse_fields:
+            return queryset.only(*article_only_fields(self.sparse_fields))
+        return queryset
 
     def get(self, request, *args, **kwargs):
         slug = kwargs.get(self.lookup_field)
-        cache_key = article_detail_cache_key(slug) if slug else None
-        if cache_key:
-            cached = cache.get(cache_key)
-            if cached:
-                return Response(cached)
-        try:
-            article = self.get_object()
-        except Http404:
-            return Response({"detail": "Article not found"}, status=status.HTTP_404_NOT_FOUND)
-        serializer = self.get_serializer(article)
-        data = serializer.data
+        self.sparse_fields = parse_fieldset(request.query_params, ArticleDetailSerializer)
+        raw_content = wants_raw_content(request.query_params)
+        cache_key = article_detail_cache_key(slug, self.sparse_fields, raw_content) if slug else None
         if cache_key:
-            cache.set(cache_key, data, CACHE_TIMEOUT)
-        return Response(data)
+            with timed("cache"):
+                cached = cache.get(cache_key)
+            record_cache(cached is not None)
+            if cached is not None:
+                return cached_payload_response(request, cached)
+        data = None
+        if not self.sparse_fields and not raw_content:
+            with timed("snapshot"):
+                data = get_detail_snapshot(slug)
+        if data is None:
+            try:
+                article = self.get_object()
+            except Http404:
+                return Response({"detail": "Article not found"}, status=status.HTTP_404_NOT_FOUND)
+            with timed("serialize"):
+                if self.sparse_fields or raw_content:
+                    data = self.get_serializer(article, fields=self.sparse_fields).data
+                else:
+                    with unpinned_writes():
+                        data = write_article_snapshot(article)
+        with timed("encode"):
+            payload = EncodedPayload(with_absolute_urls(data, request))
+        cache.set(cache_key, payload, CACHE_TIMEOUT)
+        return cached_payload_response(request, payload)
+
+
+class ArticleBatchBySlugView(EdgeCacheMixin, ReplicaReadMixin, APIView):
+    """Resolve many article slugs in one request.
+
+    Accepts ``?slugs=a,b,c`` or a JSON body ``{"slugs": [...]}``. Results come
+    back in request order, built from the cached encoded payloads, and unknown
+    slugs are listed under ``missing``.
+    """
+
+    max_slugs = ARTICLE_BATCH_LIMIT
+    # The POST form is a read with a body, not a write.
+    replica_read_methods = ("GET", "HEAD", "POST")
+    slugs = ()
+
+    def get_surrogate_keys(self, request):
+        # Unknown slugs too, so the response is purged once they are published.
+        return [article_tag(slug) for slug in self.slugs]
+
+    def get(self, request):
+        return self.batch(request, request.query_params.get("slugs", "").split(","))
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Request body must be an object"}, status=400)
+        slugs = request.data.get("slugs")
+        if not isinstance(slugs, list):
+            return Response({"error": "slugs must be a list"}, status=400)
+        if not all(isinstance(slug, str) for slug in slugs):
+            return Response({"error": "slugs must be strings"}, status=400)
+        return self.batch(request, slugs)
+
+    def batch(self, request, slugs):
+        slugs = list(dict.fromkeys(slug.strip() for slug in slugs if slug.strip()))
+        if not slugs:
+            return Response({"error": "slugs is required"}, status=400)
+        if len(slugs) > self.max_slugs:
+            return Response({"error": f"At most {self.max_slugs} slugs per request"}, status=400)
+        self.slugs = slugs
+
+        keys = article_detail_cache_keys(slugs)
+        with timed("cache"):
+            cached = cache.get_many(keys)
+        payloads = {keys[key]: payload for key, payload in cached.items()}
+        for slug in slugs:
+            record_cache(slug in payloads)
+
+        misses = [slug for slug in slugs if slug not in payloads]
+        if misses:
+            with timed("snapshot"):
+                rows = dict(ArticleSnapshot.objects.filter(slug__in=misses).values_list("slug", "detail"))
+            unresolved = [slug for slug in misses if slug not in rows]
+            if unresolved:
+                with unpinned_writes():
+                    rows.update(write_missing_article_snapshots(unresolved))
+            with timed("encode"):
+                fresh = {slug: EncodedPayload(with_absolute_urls(detail, request)) for slug, detail in rows.items()}
+            if fresh:
+                fresh_keys = {slug: key for key, slug in keys.items()}
+                cache.set_many({fresh_keys[slug]: payload for slug, payload in fresh.items()}, CACHE_TIMEOUT)
+            payloads.update(fresh)
+
+        results = b",".join(payloads[slug].identity for slug in slugs if slug in payloads)
+        missing = JSONRenderer().render([slug for slug in slugs if slug not in payloads])
+        body = b'{"results":[' + results + b'],"missing":' + missing + b"}"
+        return HttpResponse(body, content_type="application/json")
+
+
+def _feed_response(request, name):
+    content, etag, last_modified = get_feed_document(name)
+    etag = f'"{etag}"'
+    last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(content, content_type=FEED_CONTENT_TYPES[name])
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = f"public, max-age={CACHE_TIMEOUT}"
+    return response
+
+
+@require_safe
+def sitemap(request):
+    return _feed_response(request, SITEMAP)
+
+
+@require_safe
+def article_rss_feed(request):
+    return _feed_response(request, RSS)
+
+
+@require_safe
+def article_atom_feed(request):
+    return _feed_response(request, ATOM)
+
+
+class MetricsView(APIView):
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if not token:
+            # Not exposed until a scraper token is configured.
+            raise Http404("Metrics are disabled")
+        if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+        return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 class ConsultationSubmitView(APIView):
@@ -107,24 +318,7 @@ class ConsultationSubmitView(APIView):
             question=question,
         )
 
-        subject = f"Konsultasi Baru dari {name}"
-        message = (
-            f"Nama: {name}\n"
-            f"Email: {email}\n"
-            f"Telepon: {phone}\n"
-            f"Perusahaan: {company}\n\n"
-            f"Pertanyaan:\n{question}"
-        )
-
-        receiver_email = settings.CONSULTATION_RECEIVER_EMAIL
-
-        run_async(
-            send_mail,
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [receiver_email],
-        )
+        notify_consultation(name, email, phone, company, question)
 
         wa_number = (settings.CONSULTATION_WHATSAPP or "").strip()
         wa_url = None
@@ -159,15 +353,7 @@ class NewsletterSubscribeView(APIView):
             defaults={"source": source}
         )
 
-        admin_subject = "New Newsletter Subscriber"
-        admin_message = f"Email: {email}\nSource: {source}"
-        run_async(
-            send_mail,
-            admin_subject,
-            admin_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [settings.CONSULTATION_RECEIVER_EMAIL],
-        )
+        notify_new_subscriber(email, source, created)
 
         fallback_subject = "Terima kasih sudah subscribe Corvidian"
         fallback_message = (
@@ -197,14 +383,78 @@ class NewsletterSubscribeView(APIView):
             )
             if html_body:
                 message.attach_alternative(html_body, "text/html")
-            run_async(message.send, fail_silently=False)
         else:
-            run_async(
-                send_mail,
+            message = EmailMessage(
                 fallback_subject,
                 fallback_message,
                 settings.DEFAULT_FROM_EMAIL,
                 [email],
             )
+        send_in_background(message)
 
         return Response({"success": True, "created": created}, status=200)
+
+
+UNSUBSCRIBE_PAGE = '<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Corvidian Newsletter</title></head><body style="margin:0;padding:40px 20px;background-color:#f4f4f4;font-family:Arial,sans-serif;color:#333333;text-align:center;">{content}</body></html>'
+
+
+class NewsletterUnsubscribeView(APIView):
+    """Signed unsubscribe links from campaign emails.
+
+    GET shows a confirmation button so link scanners cannot unsubscribe
+    anyone; POST (also used by one-click List-Unsubscribe) removes the
+    subscriber.
+    """
+
+    # The signed token is the credential. Without session authentication a
+    # logged-in staff browser is not held to a CSRF token the mail client
+    # and the confirmation form cannot send.
+    authentication_classes = []
+
+    def get(self, request, token):
+        email = self._read_token(token)
+        if email is None:
+            return self._page("<p>Link berhenti berlangganan tidak valid.</p>", status=400)
+        return self._page(
+            f'<p>Berhenti berlangganan newsletter Corvidian untuk {escape(email)}?</p>'
+            f'<form method="post"><button type="submit" style="padding:10px 20px;border:0;border-radius:4px;background-color:#007bff;color:#ffffff;">Berhenti berlangganan</button></form>'
+        )
+
+    def post(self, request, token):
+        email = self._read_token(token)
+        if email is None:
+            return self._page("<p>Link berhenti berlangganan tidak valid.</p>", status=400)
+        NewsletterSubscriber.objects.filter(email=email).delete()
+        return self._page(f"<p>{escape(email)} sudah berhenti berlangganan newsletter Corvidian.</p>")
+
+    @staticmethod
+    def _read_token(token):
+        try:
+            return read_unsubscribe_token(token)
+        except signing.BadSignature:
+            return None
+
+    @staticmethod
+    def _page(content, status=200):
+        return HttpResponse(UNSUBSCRIBE_PAGE.format(content=content), status=status, content_type="text/html; charset=utf-8")
+
+
+@require_safe
+def newsletter_open_pixel(request, token):
+    try:
+        record_open(read_open_token(token))
+    except signing.BadSignature:
+        pass
+    response = HttpResponse(TRANSPARENT_GIF, content_type="image/gif")
+    response["Cache-Control"] = "no-store, max-age=0"
+    return response
+
+
+@require_safe
+def newsletter_click_redirect(request, token):
+    try:
+        campaign_pk, url = read_click_token(token)
+    except signing.BadSignature:
+        raise Http404("Unknown link")
+    record_click(campaign_pk, url)
+    return HttpResponseRedirect(url)
@@ -0,0 +1,127 @@
+import io
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+
+from .models import Article, NewsletterCampaign, NewsletterWelcomeMessage
+from .snapshots import summary_snapshots
+
+
+class WarmupRequests:
+    """Builds the GET requests of the warm-up as the WSGI handler would,
+    without django.test, which is not meant to be loaded in production."""
+
+    def __init__(self, host, secure=False):
+        self.host = host
+        self.secure = secure
+
+    def get(self, path):
+        path, _, query = path.partition("?")
+        return WSGIRequest({
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SCRIPT_NAME": "",
+            "SERVER_NAME": self.host.partition(":")[0],
+            "SERVER_PORT": "443" if self.secure else "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": self.host,
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.url_scheme": "https" if self.secure else "http",
+            "wsgi.input": io.BytesIO(),
+        })
+
+
+def warmup_request_factory():
+    """Requests that look like they came through the public host, so cached
+    payloads contain the same absolute URLs as real traffic would."""
+    site = urlsplit(getattr(settings, "SITE_URL", "") or "")
+    host = site.netloc or next(
+        (h for h in settings.ALLOWED_HOSTS if h and h != "*" and not h.startswith(".")),
+        "localhost",
+    )
+    return WarmupRequests(host, secure=site.scheme == "https")
+
+
+def _warm_list_page(factory, page):
+    from .views import ArticleViewSet
+
+    path = "/api/wawasan/" if page == 1 else f"/api/wawasan/?page={page}"
+    ArticleViewSet.as_view({"get": "list"})(factory.get(path))
+
+
+def _warm_article_detail(factory, slug):
+    from .views import ArticleDetailBySlugView
+
+    ArticleDetailBySlugView.as_view()(factory.get(f"/api/wawasan/slug/{slug}/"), slug=slug)
+
+
+def _warm_newsletter_body(factory, content, personalized=False):
+    # Welcome messages are sent as rendered; campaigns are sent with the
+    # per-recipient footer, see NewsletterCampaign.send_to_subscribers.
+    content.build_html_body(factory.get("/"), personalized=personalized)
+
+
+def warmup_tasks(factory, pages=3, details=20, newsletters=True):
+    page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 10
+    page_count = min(pages, max(1, math.ceil(summary_snapshots().count() / page_size)))
+    for page in range(1, page_count + 1):
+        yield f"list page {page}", _warm_list_page, (factory, page)
+
+    slugs = Article.objects.order_by("-published_at").values_list("slug", flat=True)[:details]
+    for slug in slugs:
+        yield f"article {slug}", _warm_article_detail, (factory, slug)
+
+    if newsletters:
+        active_message = (
+            NewsletterWelcomeMessage.objects.filter(is_active=True)
+            .order_by("-updated_at")
+            .first()
+        )
+        if active_message:
+            yield f"welcome message {active_message.pk}", _warm_newsletter_body, (factory, active_message)
+        for campaign in NewsletterCampaign.objects.filter(is_sent=False):
+            yield f"campaign {campaign.pk}", _warm_newsletter_body, (factory, campaign, True)
+
+
+def _run_task(func, args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+def warm_caches(pages=3, details=20, newsletters=True, budget=30.0, concurrency=4, jitter=0.0, log=print):
+    """Prebuild the article list pages, the most recent article details and
+    the rendered newsletter bodies, stopping when ``budget`` seconds are up.
+
+    Starts after a random delay of up to ``jitter`` seconds, so workers booted
+    together do not all query the database at once.
+    """
+    if jitter > 0:
+        time.sleep(random.uniform(0, jitter))
+    started = time.monotonic()
+    factory = warmup_request_factory()
+    tasks = list(warmup_tasks(factory, pages=pages, details=details, newsletters=newsletters))
+    results = {"warmed": 0, "failed": 0, "skipped": 0}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="warm-caches")
+    futures = {executor.submit(_run_task, func, args): label for label, func, args in tasks}
+    done, pending = wait(futures, timeout=budget)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for future in done:
+        if future.exception() is None:
+            results["warmed"] += 1
+        else:
+            results["failed"] += 1
+            log(f"Failed to warm {futures[future]}: {future.exception()}")
+    results["skipped"] = len(pending)
+    results["elapsed"] = time.monotonic() - started
+    return results